@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Script to compare builds by their anytime performance, using the bound
+trajectories saved by `parser.py --trajectories`.
+"""
+import argparse
+import os
+
+import numpy as np
+
+from utils.trajectory import Trajectories
+import utils.metrics as metrics
+
+# === Argument parsing ========================================================
+arg_parser = argparse.ArgumentParser(description="Anytime performance metrics.")
+arg_parser.add_argument(
+    "files", metavar="files", type=str, nargs="+", help="Trajectories to compare"
+)
+arg_parser.add_argument(
+    "-tl",
+    dest="time_limit",
+    type=float,
+    required=True,
+    help="Time horizon of the integrals, usually the time limit of the runs.",
+)
+arg_parser.add_argument(
+    "--target",
+    type=float,
+    default=0.0,
+    help="Gap for the time to target, default is 0 (solved).",
+)
+arg_parser.add_argument(
+    "-o",
+    dest="output_csv",
+    type=str,
+    default="",
+    help="Save the metrics of every instance to this CSV.",
+)
+# =============================================================================
+
+
+if __name__ == "__main__":
+    args = arg_parser.parse_args()
+    trajectories = {
+        os.path.splitext(os.path.basename(f))[0]: Trajectories.load(f)
+        for f in args.files
+    }
+
+    df = metrics.compute(trajectories, args.time_limit, args.target)
+    if args.output_csv:
+        df.to_csv(args.output_csv, index=False)
+
+    summary = df.groupby("build").agg(
+        primal=("primal_integral", "mean"),
+        dual=("dual_integral", "mean"),
+        pd=("pd_integral", "mean"),
+        reached=("time_to_target", lambda t: np.isfinite(t).sum()),
+    )
+    print(summary.sort_values("pd").to_string(float_format="{:.2f}".format))
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the scripts. Run as `bench.py <what> <args>`.
+"""
+import argparse
+import inspect
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import utils.parse_functions as pf
+from utils.utils import get_all_files
+from utils.records import to_frame
+
+# === Argument parsing ========================================================
+arg_parser = argparse.ArgumentParser(description="Benchmarks for the scripts.")
+sub = arg_parser.add_subparsers(dest="what", required=True)
+p = sub.add_parser("parse", help="Time the log parsing on a directory of logs.")
+p.add_argument("directory", type=str, help="Directory with the logs.")
+p = sub.add_parser("startup", help="Time the start of the scripts, with -X importtime.")
+p.add_argument(
+    "scripts",
+    type=str,
+    nargs="*",
+    default=["runner.py", "parser.py", "held.py", "dist.py"],
+    help="Scripts to run with --help.",
+)
+p.add_argument("-n", type=int, default=10, help="Runs of each script.")
+p.add_argument("--top", type=int, default=10, help="Slowest imports to show.")
+p = sub.add_parser("check", help="Time the bound checker on a random table.")
+p.add_argument("-n", type=int, default=50000, help="Rows of the table.")
+# =============================================================================
+
+
+def get_functions():
+    return [
+        (name, func)
+        for name, func in inspect.getmembers(pf, inspect.isfunction)
+        if name.startswith("get")
+    ]
+
+
+def extract(log) -> dict:
+    d = {}
+    for name, func in get_functions():
+        try:
+            d.update(func(log))
+        except Exception as e:
+            d[name] = repr(e)
+    return d
+
+
+def bench_parse(directory):
+    """
+    Compare grepping each field (one `grep` process per pattern) against
+    scanning each log once, checking that both give the same fields.
+    """
+    all_files = get_all_files(directory)
+
+    start = time.perf_counter()
+    old = [extract(f) for f in all_files]
+    t_old = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new = [extract(pf.scan(f)) for f in all_files]
+    t_new = time.perf_counter() - start
+
+    diff = [f for f, o, n in zip(all_files, old, new) if o != n]
+    for f in diff:
+        print(f"❌ {f} parsed differently.")
+
+    print(f"Logs       : {len(all_files)}")
+    print(f"grep       : {t_old:.3f}s")
+    print(f"scan       : {t_new:.3f}s")
+    print(f"Speedup    : {t_old / t_new:.1f}x")
+
+
+def importtime(stderr: str) -> list[tuple[int, str]]:
+    """
+    The (cumulative us, module) of each top-level import, from the output
+    of -X importtime, slowest first.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if not name.startswith("  "):  # only the top level
+            imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)
+
+
+def bench_startup(scripts, n=10, top=10):
+    """
+    Wall time of `script --help` (median of n runs) and the imports it
+    spends it on. The goal is well under 100ms, pandas and friends should
+    only be imported by the commands that use them.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    base = [sys.executable, "-c", "pass"]
+    for script in ["python", *scripts]:
+        cmd = base if script == "python" else [sys.executable, script, "--help"]
+        times = []
+        for _ in range(n):
+            start = time.perf_counter()
+            subprocess.run(cmd, cwd=here, capture_output=True)
+            times.append(time.perf_counter() - start)
+        print(f"{script:<12}: {1000 * statistics.median(times):6.1f}ms")
+        if script == "python":
+            continue
+
+        cmd = [sys.executable, "-X", "importtime", script, "--help"]
+        out = subprocess.run(cmd, cwd=here, capture_output=True, text=True)
+        for us, name in importtime(out.stderr)[:top]:
+            print(f"    {us / 1000:6.1f}ms {name}")
+
+
+def bench_check(n=50000):
+    """
+    Check a table of n rows drawn from the historical bounds, perturbed so
+    that every verdict shows up.
+    """
+    import numpy as np
+    import utils.checker as checker
+
+    start = time.perf_counter()
+    ref = checker.reference()
+    t_load = time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    names = np.append(ref.index.to_numpy(), "missing.col")
+    df = to_frame(
+        [
+            {"instance": i, "lb": lb, "ub": ub}
+            for i, lb, ub in zip(
+                rng.choice(names, n), rng.integers(1, 40, n), rng.integers(1, 40, n)
+            )
+        ]
+    )
+
+    start = time.perf_counter()
+    checked = checker.check(df)
+    t_check = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lines = checker.messages(checked)
+    t_messages = time.perf_counter() - start
+
+    print(checked["verdict"].value_counts().to_string())
+    print(f"Rows       : {n}")
+    print(f"Reference  : {1000 * t_load:.1f}ms")
+    print(f"Check      : {1000 * t_check:.1f}ms")
+    print(f"Messages   : {1000 * t_messages:.1f}ms ({len(lines)} lines)")
+
+
+if __name__ == "__main__":
+    args = arg_parser.parse_args()
+    if args.what == "parse":
+        bench_parse(args.directory)
+    elif args.what == "startup":
+        bench_startup(args.scripts, args.n, args.top)
+    elif args.what == "check":
+        bench_check(args.n)
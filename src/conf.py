@@ -6,6 +6,7 @@ macos_script = macos_path + "/script"
 macos_logs = macos_path + "/logs"
 macos_instances = macos_path + "/inst"
 macos_hist = macos_instances + "/lit/best.csv"
+figures = macos_path + "/write/dis/img"
 
 linux_path = "/home/ieremies"
 linux_code = linux_path + "/code"
@@ -18,6 +19,10 @@ default_instances = "easy"
 default_machine = "spock"
 time_limit = 100
 
+# Coordinator of dist.py. Its key is never in the repo, only in MEST_AUTHKEY.
+dist_port = 5150
+dist_bind = "127.0.0.1"
+
 debug = False
 
 cmd = "{code}/build/{build} {inst_set}/{instance}"
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Script to run a sweep over several machines.
+
+One coordinator holds the queue of (build, instance, tl) jobs, and workers
+on any machine connect to it over TCP and pull one job at a time. A worker
+runs the build with its own paths (see conf), parses the log, and sends
+back the record with the zlib-compressed log, which the coordinator writes
+to its own logs directory. Jobs whose worker disconnects go back to the
+queue.
+
+Both ends must have the same secret in MEST_AUTHKEY, and every connection
+is authenticated both ways with it before anything else is sent. Messages
+are JSON and raw bytes, never pickles, so even a peer with the key can only
+send jobs and results. The coordinator listens on localhost by default, and
+the other machines reach it through SSH:
+
+    spock$ export MEST_AUTHKEY=...
+    spock$ ./dist.py serve a.e+b.e easy -tl 100
+    other$ ssh -fNL 5150:localhost:5150 spock
+    other$ MEST_AUTHKEY=... ./dist.py work localhost -j 8
+
+or, on a trusted network, with `serve --bind <address of spock>`.
+
+With `serve --local N`, N workers running one job each are started on
+this machine, each pinned to its own core. That is also the way to test
+it, down to killing one of them to see its job go to the others.
+"""
+import argparse
+import json
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+import conf
+from parser import parse_record, parser_version, get_cache, cached_record
+from runner import make_job, report, output_of, code, inst, logs
+from utils.utils import get_instances_from_set, get_n_jobs
+from utils.topology import parse_list, placement
+import utils.schedule as schedule
+import utils.engine as engine
+
+# === Argument parsing ========================================================
+arg_parser = argparse.ArgumentParser(description="Run a sweep on several machines.")
+sub = arg_parser.add_subparsers(dest="what", required=True)
+p = sub.add_parser("serve", help="Hold the jobs and collect the results.")
+p.add_argument("build", type=str, help="Builds to run, as a.e+b.e.")
+p.add_argument("inst_set", type=str, help="Which instance set to run.")
+p.add_argument(
+    "-tl",
+    dest="time_limit",
+    type=int,
+    default=conf.time_limit,
+    help="Time limit for the execution of each command.",
+)
+p.add_argument("--force", action="store_true", default=False)
+p.add_argument("--port", type=int, default=conf.dist_port)
+p.add_argument(
+    "--bind",
+    type=str,
+    default=conf.dist_bind,
+    help=f"Address to listen on, default is {conf.dist_bind} (use SSH tunnels).",
+)
+p.add_argument(
+    "--local", type=int, default=0, help="Also run this many jobs on this machine."
+)
+p = sub.add_parser("work", help="Run jobs from a coordinator.")
+p.add_argument("host", type=str, help="Where the coordinator is.")
+p.add_argument("--port", type=int, default=conf.dist_port)
+p.add_argument(
+    "-j", dest="jobs", type=int, default=None, help="Jobs at a time, one per core."
+)
+p.add_argument(
+    "--cpus",
+    type=lambda s: set(parse_list(s)),
+    default=None,
+    help="CPUs to pin every job to, as 0,4, instead of one core per job.",
+)
+# =============================================================================
+
+def send(conn, obj):
+    conn.send_bytes(json.dumps(obj).encode())
+
+
+def recv(conn):
+    return json.loads(conn.recv_bytes())
+
+
+# === Coordinator =============================================================
+def serve(
+    builds,
+    inst_set,
+    tl,
+    authkey,
+    force=False,
+    port=conf.dist_port,
+    local=0,
+    bind=conf.dist_bind,
+):
+    """
+    Run every build on the instance set on the workers that connect, and
+    save each build as runner.run_matrix does.
+    """
+    from tqdm import tqdm
+
+    instances = get_instances_from_set(inst, inst_set)
+    for build in builds:
+        os.makedirs(f"{logs}/tmp/{build}", exist_ok=True)
+
+    # Existing logs are reused here, only the rest goes to the queue
+    results, jobs, expected = {}, [], {}
+    for build in builds:
+        est = schedule.expected_runtimes(instances, tl, inst, [output_of(build)])
+        for i in instances:
+            job = make_job(build, i, tl, force)
+            if job.run:
+                jobs.append(job)
+                expected[job.key] = est[i]
+            else:
+                results[job.key] = cached_record(job.log_file)
+    jobs.sort(key=lambda j: expected[j.key], reverse=True)
+
+    todo = queue.Queue()
+    for job in jobs:
+        todo.put(job)
+    bar = tqdm(total=len(jobs), smoothing=0.0)
+    lock = threading.Lock()
+    done = threading.Event()
+    if not jobs:
+        done.set()
+
+    def handle(conn):
+        job = None
+        try:
+            hello = recv(conn)
+            version = hello["version"]
+            while True:
+                # Idle workers wait until everything is done, as a job may
+                # still come back from a worker that is lost
+                try:
+                    job = todo.get(timeout=1)
+                except queue.Empty:
+                    if done.is_set():
+                        send(conn, None)
+                        return
+                    continue
+                build, instance = job.key
+                send(conn, {"build": build, "instance": instance, "tl": job.tl})
+                d = recv(conn)
+                log = conn.recv_bytes()
+
+                with open(job.log_file, "wb") as fd:
+                    fd.write(zlib.decompress(log))
+                # A worker with another parser version gets parsed again here
+                if d is None or version != parser_version():
+                    d = parse_record(job.log_file)
+                get_cache().put(job.log_file, d)
+
+                with lock:
+                    results[job.key] = d
+                    bar.update()
+                    if bar.n == len(jobs):
+                        done.set()
+                job = None
+        except (EOFError, OSError, ValueError, KeyError, TypeError) as e:
+            print(f"❌ Lost a worker: {e!r}")
+        finally:
+            if job is not None:
+                todo.put(job)  # for the other workers, or the next to connect
+            conn.close()
+
+    handlers = []
+
+    def accept(listener):
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError, ConnectionError):
+                continue  # e.g. a probe, or a peer gone before the handshake
+            except OSError:
+                return  # the listener was closed
+            handlers.append(threading.Thread(target=handle, args=(conn,), daemon=True))
+            handlers[-1].start()
+
+    listener = Listener((bind, port), authkey=authkey)
+    print(f"Serving {len(jobs)} jobs on {bind}:{port}")
+    threading.Thread(target=accept, args=(listener,), daemon=True).start()
+    # One process per local job, each told which core is its own, as they
+    # would all take the same one by themselves
+    cmd = [sys.executable, __file__, "work", "localhost", "--port", str(port), "-j", "1"]
+    workers = []
+    for cpus in (placement(local) or [None] * local) if local else []:
+        pin = ["--cpus", ",".join(map(str, sorted(cpus)))] if cpus else []
+        workers.append(subprocess.Popen([*cmd, *pin]))
+
+    done.wait()
+    bar.close()
+    get_cache().flush()
+    for t in list(handlers):  # let the idle workers know
+        t.join(timeout=5)
+
+    for w in workers:
+        w.wait()
+
+    for build in builds:
+        records = [results.get((build, i)) for i in instances]
+        report(build, [r for r in records if r is not None], output_of(build))
+
+
+# === Worker ==================================================================
+def work_one(host, port, authkey, cpus=None):
+    """
+    Pull jobs from the coordinator until there are none left.
+    """
+    for _ in range(30):  # the coordinator may still be starting
+        try:
+            conn = Client((host, port), authkey=authkey)
+            break
+        except ConnectionRefusedError:
+            time.sleep(1)
+        except AuthenticationError:
+            print(f"❌ {host}:{port} has another MEST_AUTHKEY")
+            return
+    else:
+        print(f"❌ Could not connect to {host}:{port}")
+        return
+
+    tmp = tempfile.mkdtemp(prefix="mest-")
+    try:
+        with conn:
+            run_jobs(conn, tmp, cpus)
+    except (EOFError, OSError) as e:
+        print(f"❌ Lost the coordinator: {e!r}")
+    shutil.rmtree(tmp, ignore_errors=True)
+
+
+def run_jobs(conn, tmp, cpus=None):
+    """
+    Run the jobs the coordinator sends, with their logs in `tmp`.
+    """
+    send(conn, {"host": socket.gethostname(), "version": parser_version()})
+    while (job := recv(conn)) is not None:
+        build, instance, tl = job["build"], job["instance"], job["tl"]
+        cmd = conf.cmd.format(
+            code=code, build=build, inst_set=f"{inst}/all", instance=instance
+        )
+        log_file = f"{tmp}/{instance}.log"
+        try:
+            engine.execute_sync(cmd.split(), log_file, tl, cpus)
+        except OSError as e:
+            with open(log_file, "a") as fd:
+                fd.write(f"Did not run {instance}: {e}\n")
+        try:
+            d = parse_record(log_file)
+        except Exception as e:
+            print(f"Error while parsing {instance}: {e}")
+            d = None
+        send(conn, d)
+        with open(log_file, "rb") as fd:
+            conn.send_bytes(zlib.compress(fd.read()))
+        os.remove(log_file)
+
+
+def work(host, authkey, port=conf.dist_port, jobs=None, cpus=None):
+    """
+    Run `jobs` jobs at a time, each pinned to its own physical core (or all
+    to `cpus`), with one connection each.
+    """
+    jobs = jobs or get_n_jobs()
+    cores = [cpus] * jobs if cpus else placement(jobs) or [None] * jobs
+    threads = [
+        threading.Thread(target=work_one, args=(host, port, authkey, cpus))
+        for cpus in cores
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+if __name__ == "__main__":
+    args = arg_parser.parse_args()
+    authkey = os.environ.get("MEST_AUTHKEY", "").encode()
+    if not authkey:
+        arg_parser.error("set the shared secret in MEST_AUTHKEY")
+    if args.what == "serve":
+        serve(
+            args.build.split("+"),
+            args.inst_set,
+            args.time_limit,
+            authkey,
+            args.force,
+            args.port,
+            args.local,
+            args.bind,
+        )
+    else:
+        work(args.host, authkey, args.port, args.jobs, args.cpus)
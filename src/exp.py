@@ -1,8 +1,6 @@
 #!/usr/bin/env python3
-import sys
-import os
-
-from utils.utils import get_all_files
+import conf
+from runner import run_matrix
 
 builds = [
     "no_held_trim.e",
@@ -28,13 +26,10 @@ builds = [
     "round_eight.e",
 ]
 
-for b in builds:
-    if b[-1] != "e":
-        continue
-    if "debug.e" in b or "primal.e" in b:
-        continue
-    # run "py script/src/runner.py {build} easy+medium+dimacsreduced -tl 30"
-    print(f"Running {b}")
-    os.system(f"python3 script/src/runner.py {b} easy+medium+dimacsreduced -tl 30")
-    print(f"Finished {b}")
-    print("\n")
+builds = [b for b in builds if b[-1] == "e"]
+builds = [b for b in builds if "debug.e" not in b and "primal.e" not in b]
+
+# All the builds share the same workers, instead of running one after another.
+# Everything runs for 30s first, then only the timeouts with longer limits.
+print(f"Running {len(builds)} builds")
+run_matrix(builds, "easy+medium+dimacsreduced", tl=30, cap=conf.time_limit)
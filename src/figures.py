@@ -0,0 +1,208 @@
+#!/usr/bin/env python3.12
+"""
+Script to render the figures of the dissertation in one go, e.g.
+
+    ./figures.py ours.csv held.csv -j 4
+    ./figures.py ours.csv held.csv -f accu-all matilda-dist
+
+The result files, metadata and instance sets are read once into a Store,
+then each figure of FIGURES is rendered from it and saved as {name}.svg.
+With -j, the figures are rendered by worker processes forked after the
+store is loaded, so they share it instead of reading everything again.
+
+Like make, a figure is only rendered again if one of its inputs changed
+since it was last saved: the content of the result files it uses, the
+style files, the code computing what is plotted (MODULES), its parameters,
+and the instances (and their features) it is restricted to. The keys are
+kept in {outdir}/.figures.sqlite.
+
+root.py only prints tables, so it is not one of the figures.
+"""
+import argparse
+import hashlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, NamedTuple
+
+import matplotlib
+
+matplotlib.use("Agg")  # only saved, never shown
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+import conf
+from utils.cache import FigureCache
+from utils.catalog import content_hash, get_catalog
+from utils.features import load as load_features
+from utils.utils import get_instances_from_set
+import utils.compare as compare
+import utils.plots as plots
+import utils.profile as profile
+
+
+class Figure(NamedTuple):
+    name: str
+    plot: Callable
+    files: slice = slice(None)  # which of the result files it compares
+    instances: str | None = None  # instance set it is restricted to
+    metadata: bool = False  # whether it needs the MATILDA features
+
+
+FIGURES = [
+    Figure("accu-all", plots.accu, instances="all"),
+    Figure("pp-all", plots.perf, instances="all"),
+    Figure("hist", plots.histogram),
+    Figure("accu-perf-matilda", plots.accu_perf),
+    Figure("matilda-dist", plots.matilda_dist, metadata=True),
+    Figure("matilda-perf", plots.matilda_perf, files=slice(2), metadata=True),
+]
+NAMES = [f.name for f in FIGURES]
+
+# The figures and every value in them (ECDFs, gaps, ratios, diffs) come from
+# these, so a change to any of them renders the figures again
+MODULES = (plots, profile, compare)
+
+
+class Store:
+    """
+    Everything the figures are made of, read once: the results ({name of the
+    CSV: table}), the features of the instances and the instance sets.
+    """
+
+    def __init__(self, files: list[str], inst_dir: str):
+        self.inst_dir = inst_dir
+        self.files = {os.path.splitext(os.path.basename(f))[0]: f for f in files}
+        self._results = {}
+        self._metadata = None
+        self._instances = {}
+
+    def result(self, name: str) -> pd.DataFrame:
+        if name not in self._results:
+            self._results[name] = pd.read_csv(self.files[name])
+        return self._results[name]
+
+    @property
+    def metadata(self) -> pd.DataFrame:
+        if self._metadata is None:
+            self._metadata = load_features(self.inst_dir)
+        return self._metadata
+
+    def instances(self, inst_set: str) -> list[str]:
+        if inst_set not in self._instances:
+            self._instances[inst_set] = get_instances_from_set(self.inst_dir, inst_set)
+        return self._instances[inst_set]
+
+    def args(self, figure: Figure) -> tuple:
+        names = list(self.files)[figure.files]
+        args = ({n: self.result(n) for n in names},)
+        if figure.instances is not None:
+            args += (self.instances(figure.instances),)
+        if figure.metadata:
+            args += (self.metadata,)
+        return args
+
+    def key(self, figure: Figure) -> str:
+        """
+        Hash of everything the figure is made of, without reading the results
+        or computing the features.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        params = figure._replace(plot=figure.plot.__name__)
+        h.update(repr(params).encode())
+        h.update(matplotlib.__version__.encode())
+        for path in (os.path.expanduser(plots.STYLE), *(m.__file__ for m in MODULES)):
+            h.update(content_hash(path).encode())
+        for name in list(self.files)[figure.files]:
+            h.update(f"{name}:{content_hash(self.files[name])}".encode())
+        if figure.instances is not None:
+            h.update(repr(sorted(self.instances(figure.instances))).encode())
+        if figure.metadata:
+            # metadata.csv and the graphs the missing features come from
+            try:
+                h.update(content_hash(f"{self.inst_dir}/metadata.csv").encode())
+            except OSError:
+                pass
+            rows = get_catalog(self.inst_dir).query("all", columns=("name", "hash"))
+            h.update(repr(rows).encode())
+        return h.hexdigest()
+
+
+# The store of this process, inherited by the workers when they are forked
+store: Store | None = None
+
+
+def render(name: str, outdir: str) -> tuple[str, float]:
+    figure = FIGURES[NAMES.index(name)]
+    start = time.perf_counter()
+    fig = figure.plot(*store.args(figure))
+    path = f"{outdir}/{figure.name}.svg"
+    fig.savefig(path)
+    plt.close(fig)
+    return path, time.perf_counter() - start
+
+
+# === Argument parsing ========================================================
+arg_parser = argparse.ArgumentParser(description="Render the figures.")
+arg_parser.add_argument(
+    "files", type=str, nargs="+", help="Result files, the first is the reference."
+)
+arg_parser.add_argument(
+    "-f",
+    "--figures",
+    type=str,
+    nargs="+",
+    default=NAMES,
+    choices=NAMES,
+    help="Figures to render. Default is all of them.",
+)
+arg_parser.add_argument(
+    "-j", "--jobs", type=int, default=1, help="Number of worker processes."
+)
+arg_parser.add_argument(
+    "-o", "--outdir", type=str, default=conf.figures, help="Where to save the figures."
+)
+arg_parser.add_argument(
+    "--force",
+    action="store_true",
+    default=False,
+    help="Render the figures even if their inputs did not change.",
+)
+# =============================================================================
+
+inst = conf.macos_instances if os.uname().sysname == "Darwin" else conf.linux_instances
+
+
+if __name__ == "__main__":
+    args = arg_parser.parse_args()
+    os.makedirs(args.outdir, exist_ok=True)
+
+    store = Store(args.files, inst)
+    cache = FigureCache(f"{args.outdir}/.figures.sqlite")
+    keys, selected = {}, []
+    for f in FIGURES:
+        if f.name not in args.figures:
+            continue
+        keys[f.name] = store.key(f)
+        if not args.force and cache.fresh(f"{args.outdir}/{f.name}.svg", keys[f.name]):
+            print(f"{f.name} is up to date.")
+            continue
+        selected.append(f)
+        store.args(f)  # load what it needs before forking
+
+    def done(name, path, t):
+        cache.put(path, keys[name])
+        print(f"Saved to {path} ({t:.2f}s).")
+
+    plots.style()
+    if args.jobs <= 1 or len(selected) <= 1:
+        for f in selected:
+            done(f.name, *render(f.name, args.outdir))
+    else:
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(args.jobs, context) as ex:
+            futures = {ex.submit(render, f.name, args.outdir): f.name for f in selected}
+            for future in as_completed(futures):
+                done(futures[future], *future.result())
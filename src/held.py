@@ -1,19 +1,25 @@
 #!/usr/bin/env python3
 """
 Script to run Held's code.
+
+pandas, tqdm and numpy are only imported when they are needed, see parser.py.
 """
 import argparse
 import os
-import subprocess
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from random import shuffle
-
-from tqdm import tqdm
-import pandas as pd
+from queue import Queue
+from typing import TYPE_CHECKING
 
 import conf
-from utils.utils import get_n_jobs, get_instances_from_set, get_n_jobs, get_all_files
-from utils.parse_functions import grep
+from utils.utils import get_n_jobs, get_instances_from_set, get_all_files, pmap
+from utils.parse_functions import grep, scan, get_usage, ALL, FIRST, LAST
+from utils.engine import execute_sync
+from utils.topology import placement
+from utils.records import to_frame
+import utils.schedule as schedule
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # === Argument parsing ========================================================
 arg_parser = argparse.ArgumentParser(description="Help running Held's code.")
@@ -37,25 +43,32 @@ color = "/home/ieremies/exactcolors/color"
 inst = "/home/ieremies/inst"
 # =============================================================================
 
+# Every pattern parse_inst greps for.
+PATTERNS = {
+    "Finished initial bounds: LB": FIRST,
+    "Greedy Colors:": FIRST,
+    "Compute coloring finished: LB": FIRST,
+    "Upper bound improved:": LAST,
+    "Lower bound improved:": LAST,
+    "Computing coloring took": FIRST,
+    "harness: ": LAST,
+}
 
-def run_instance(instance, tl, force=False):
+
+def run_instance(instance, tl, force=False, cpus=None):
     root = ""  # "-s 0 -d"
-    cmd = f"timeout --kill-after={0.01*tl}s {1.1*tl}s {color} -l {tl} {root} {inst}/all/{instance}"
+    cmd = f"{color} -l {tl} {root} {inst}/all/{instance}"
     log_file = f"{logs}/held/{instance}.log"
 
     if os.path.exists(log_file):
         # print(f"Skipping {instance}")
         return
 
-    with open(log_file, "w") as fd:
-        try:
-            subprocess.run(
-                cmd.split(), timeout=1.2 * tl, stdout=fd, stderr=fd, text=True
-            )
-        except subprocess.TimeoutExpired:
-            pass
-        except Exception as _:
-            return
+    try:
+        # Held's code has its own limit, only kill it if it overruns by 10%
+        execute_sync(cmd.split(), log_file, 1.1 * tl, cpus)
+    except Exception as _:
+        return
 
     # Check if the log file exists
     if os.path.exists(log_file):
@@ -66,81 +79,122 @@ def run_instance(instance, tl, force=False):
         fd.write(f"Did not run {instance}\n")
 
 
-def parse_inst(log_file) -> pd.DataFrame:
-    df = pd.DataFrame(
-        columns=["instance", "lb", "ub", "time", "root_lb", "root_ub", "root_time"]
-    )
-    inst_name = log_file.split("/")[-1].replace(".log", "")
-    df["instance"] = [inst_name]
+def parse_record(log_file) -> dict:
+    columns = ["instance", "lb", "ub", "time", "root_lb", "root_ub", "root_time"]
+    d = dict.fromkeys(columns)
+    d["instance"] = log_file.split("/")[-1].replace(".log", "")
+    log = scan(log_file, PATTERNS)
+    d.update(get_usage(log))
 
-    root = grep("Finished initial bounds: LB", log_file)
+    root = grep("Finished initial bounds: LB", log)
     if not root:
-        dsatur = grep("Greedy Colors:", log_file)
+        dsatur = grep("Greedy Colors:", log)
         if dsatur:
-            df["ub"] = int(dsatur[0].split("Greedy Colors: ")[1].split(" in")[0])
-            df["root_ub"] = df["ub"]
-        return df
+            d["ub"] = int(dsatur[0].split("Greedy Colors: ")[1].split(" in")[0])
+            d["root_ub"] = d["ub"]
+        return d
 
-    df["root_lb"] = int(root[0].split("LB ")[1].split(" and UB")[0])
-    df["root_ub"] = int(root[0].split("and UB ")[1].split(" in")[0])
-    df["root_time"] = float(root[0].split("in ")[1].split(" seconds")[0])
+    d["root_lb"] = int(root[0].split("LB ")[1].split(" and UB")[0])
+    d["root_ub"] = int(root[0].split("and UB ")[1].split(" in")[0])
+    d["root_time"] = float(root[0].split("in ")[1].split(" seconds")[0])
 
-    opt = grep("Compute coloring finished: LB", log_file)
+    opt = grep("Compute coloring finished: LB", log)
     if not opt:
         # Upper bound improved: LB %d and UB %d
-        all_ub = grep("Upper bound improved:", log_file)
+        all_ub = grep("Upper bound improved:", log)
         if not all_ub:
-            df["ub"] = df["root_ub"]
+            d["ub"] = d["root_ub"]
         else:
-            df["ub"] = int(all_ub[-1].split("and UB ")[1])
+            d["ub"] = int(all_ub[-1].split("and UB ")[1])
 
         # Lower bound improved: LB %d and UB %d
-        all_lb = grep("Lower bound improved:", log_file)
+        all_lb = grep("Lower bound improved:", log)
         if not all_lb:
-            df["lb"] = df["root_lb"]
+            d["lb"] = d["root_lb"]
         else:
-            df["lb"] = int(all_lb[-1].split("LB ")[1])
-        return df
+            d["lb"] = int(all_lb[-1].split("LB ")[1])
+        return d
 
-    df["lb"] = int(opt[0].split("LB ")[1].split(" and UB")[0])
-    df["ub"] = int(opt[0].split("and UB ")[1])
+    d["lb"] = int(opt[0].split("LB ")[1].split(" and UB")[0])
+    d["ub"] = int(opt[0].split("and UB ")[1])
 
-    compute = grep("Computing coloring took", log_file)
+    compute = grep("Computing coloring took", log)
     if not compute:
-        dsatur = grep("Greedy Colors:", log_file)
-        df["ub"] = int(dsatur[0].split("Greedy Colors: ")[1].split(" in")[0])
-        return df
+        dsatur = grep("Greedy Colors:", log)
+        d["ub"] = int(dsatur[0].split("Greedy Colors: ")[1].split(" in")[0])
+        return d
 
-    df["time"] = float(compute[0].split("took ")[1].split(" seconds")[0])
+    d["time"] = float(compute[0].split("took ")[1].split(" seconds")[0])
 
-    return df
+    return d
+
+
+def parse_trajectory(log_file):
+    """
+    The (time, lb, ub) events of a log. Held's code only prints times for the
+    initial bounds and the end of the run, the events in between have NaN.
+    """
+    import utils.trajectory as trajectory
+
+    init = "Finished initial bounds: LB"
+    opt = "Compute coloring finished: LB"
+    improved = ("Upper bound improved:", "Lower bound improved:")
+    log = scan(log_file, dict.fromkeys(PATTERNS, ALL))
+
+    events = []
+    end = grep("Computing coloring took", log)
+    for p, line in log.events(init, *improved, opt):
+        lb = int(line.split("LB ")[1].split(" and UB")[0])
+        ub = int(line.split("and UB ")[1].split()[0])
+        t = float("nan")
+        if p == init:
+            t = float(line.split("in ")[1].split(" seconds")[0])
+        elif p == opt and end:
+            t = float(end[0].split("took ")[1].split(" seconds")[0])
+        events.append((t, lb, ub))
+
+    return trajectory.as_arrays(events)
 
 
 def run(inst_set, tl, force=False):
+    from tqdm import tqdm
+
     if not os.path.exists(f"{logs}/held"):
         os.makedirs(f"{logs}/held")
 
     # get instances from the given set
     instances = get_instances_from_set(inst, inst_set)
-    shuffle(instances)
+    expected = schedule.expected_runtimes(instances, tl, inst, ["held.csv"])
+    instances = schedule.longest_first(instances, expected)
+
+    # One physical core for each worker, taken by each run while it lasts
+    workers = get_n_jobs()
+    free = Queue()
+    for cpus in placement(workers) or [None] * workers:
+        free.put(cpus)
+
+    def pinned(instance):
+        cpus = free.get()
+        try:
+            return run_instance(instance, tl, force, cpus)
+        finally:
+            free.put(cpus)
 
     results = []
-    with ThreadPoolExecutor(max_workers=get_n_jobs()) as ex:
-        f2e = {ex.submit(run_instance, i, tl, force): i for i in instances}
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        f2e = {ex.submit(pinned, i): i for i in instances}
         for future in tqdm(as_completed(f2e), total=len(f2e)):
             results.append(future.result())
 
 
-def parse_all(directory, output_csv: str = "") -> pd.DataFrame:
-    all_files = get_all_files(directory)
-    results = []
+def parse_all(directory, output_csv: str = "", processes=True) -> "pd.DataFrame":
+    from tqdm import tqdm
 
-    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
-        futures = {executor.submit(parse_inst, f): f for f in all_files}
-        for future in tqdm(as_completed(futures), total=len(futures), smoothing=0.0):
-            results.append(future.result())
+    all_files = get_all_files(directory)
+    parsed = pmap(parse_record, all_files, processes=processes)
+    results = list(tqdm(parsed, total=len(all_files), smoothing=0.0))
 
-    df = pd.concat(results, ignore_index=True)
+    df = to_frame(results)
     if output_csv:
         df = df.sort_values(by="instance")
         df.to_csv(output_csv, index=False)
@@ -149,6 +203,9 @@ def parse_all(directory, output_csv: str = "") -> pd.DataFrame:
 
 
 if __name__ == "__main__":
+    import utils.trajectory as trajectory
+
     args = arg_parser.parse_args()
     run(args.inst_set, args.time_limit)
     parse_all(f"{logs}/held", "held.csv")
+    trajectory.collect(f"{logs}/held", "held.npz", extract=parse_trajectory)
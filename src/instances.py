@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Script to query the instance catalog, e.g.
+
+    ./instances.py easy+medium -w "n > 500, m < 10000" -c name n m
+
+With --stats, the graph statistics (density, degrees, components) of the
+instances are computed first, where missing, so they can be queried too.
+Likewise --features for the spectral features of MATILDA.
+"""
+import argparse
+import os
+
+import conf
+from utils.catalog import get_catalog, COLUMNS
+import utils.dimacs as dimacs
+import utils.features as features
+
+# === Argument parsing ========================================================
+arg_parser = argparse.ArgumentParser(description="Query the instance catalog.")
+arg_parser.add_argument("inst_set", type=str, help="Instance sets, as easy+medium.")
+arg_parser.add_argument(
+    "-w", "--where", type=str, default="", help='Conditions, as "n > 500, m < 1e4".'
+)
+arg_parser.add_argument(
+    "-c",
+    "--columns",
+    type=str,
+    nargs="+",
+    default=["name"],
+    choices=COLUMNS,
+    help="Columns to print.",
+)
+arg_parser.add_argument(
+    "--stats",
+    action="store_true",
+    default=False,
+    help="Compute the graph statistics missing from the catalog.",
+)
+arg_parser.add_argument(
+    "--features",
+    action="store_true",
+    default=False,
+    help="Compute the spectral features missing from the catalog.",
+)
+arg_parser.add_argument(
+    "--rebuild",
+    action="store_true",
+    default=False,
+    help="Read every file again, even those that did not change.",
+)
+# =============================================================================
+
+inst = conf.macos_instances if os.uname().sysname == "Darwin" else conf.linux_instances
+
+
+if __name__ == "__main__":
+    args = arg_parser.parse_args()
+    catalog = get_catalog(inst)
+    if args.rebuild:
+        catalog.refresh(args.inst_set, full=True)
+    if args.stats:
+        dimacs.index(inst, args.inst_set)
+    if args.features:
+        features.index(inst, args.inst_set)
+    try:
+        rows = catalog.query(args.inst_set, args.where, args.columns)
+    except ValueError as e:
+        arg_parser.error(str(e))
+    for r in rows:
+        print(*r if isinstance(r, tuple) else [r], sep="\t")
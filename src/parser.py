@@ -1,71 +1,135 @@
 #!/usr/bin/env python3
-import inspect
-import sys, os
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
-from tqdm import tqdm
+"""
+Script to parse a directory of logs into a table.
+
+pandas, tqdm, numpy (for the trajectories) and inspect are only imported
+when they are needed, so `--help` and the scripts importing this one start
+fast.
+"""
+import argparse
+import hashlib
+import os
 import warnings
-import pandas as pd
+from typing import TYPE_CHECKING
 
 # Suppress FutureWarning messages
 warnings.simplefilter(action="ignore", category=FutureWarning)
 
 import conf
 import utils.parse_functions as pf
-from utils.utils import get_all_files
-import utils.checker
-
+from utils.utils import get_all_files, pmap
+from utils.cache import ParseCache
+from utils.records import to_frame
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# === Argument parsing ========================================================
+arg_parser = argparse.ArgumentParser(description="Parse a directory of logs.")
+arg_parser.add_argument("directory", type=str, help="Directory with the logs.")
+arg_parser.add_argument("output_csv", type=str, help="Where to save the table.")
+arg_parser.add_argument(
+    "--trajectories",
+    type=str,
+    default="",
+    help="Also save the bound trajectories of each log to this .npz file.",
+)
+# =============================================================================
 
 logs = conf.macos_logs if os.uname().sysname == "Darwin" else conf.linux_logs
 
 
-def parse_inst(log_file) -> pd.DataFrame:
-    # Create new dataframe, those are the minimum columns
-    df = pd.DataFrame(columns=["instance", "lb", "ub", "time", "errors", "warnings"])
+def parse_record(log_file) -> dict:
+    """
+    Parse a log into a dictionary {column: value}.
+    """
+    import inspect
+
     inst_name = log_file.split("/")[-1].replace(".log", "")
-    df["instance"] = [inst_name]
+    # Those are the minimum columns
+    d = {"instance": inst_name, "lb": None, "ub": None, "time": None}
+    d.update({"errors": None, "warnings": None})
 
+    log = pf.scan(log_file)
     for name, func in inspect.getmembers(pf, inspect.isfunction):
         if inspect.isfunction(func) and name.startswith("get"):
             try:
-                d = func(log_file)
+                d.update(func(log))
             except Exception as e:
                 print(f"Error in {name} for {inst_name}: {e}")
                 continue
 
-            for key in d:
-                if type(d[key]) is list and len(d[key]) > 1:
-                    df[key] = [d[key]]
-                else:
-                    df[key] = d[key]
-
-    if df["errors"][0] and len(df["errors"][0][0]) > 20:
-        print(f"\n❌ {inst_name + ' ' * (14 - len(inst_name))}: {df['errors'][0][0]}")
-        df["errors"] = len(df["errors"])
+    # Short first matches are stray "ERR"/"FATL" substrings, not errors
+    if d["errors"] and len(d["errors"][0]) > 20:
+        print(f"\n❌ {inst_name + ' ' * (14 - len(inst_name))}: {d['errors'][0]}")
+        d["errors"] = len(d["errors"])
     else:
-        df["errors"] = None
+        d["errors"] = None
 
     # TODO treat warnings
-    df["warnings"] = len(df["warnings"]) - 1
+    d["warnings"] = 0
 
-    for i in df.iterrows():
-        s = utils.checker.check(dict(i[1]))
-        if s:
-            print(*s, sep="\n")
+    return d
 
-    return df
 
+def parser_version() -> str:
+    """
+    Any change to the parsing code invalidates the cached records.
+    """
+    import inspect
+
+    src = inspect.getsource(pf) + inspect.getsource(parse_record)
+    return hashlib.sha1(src.encode()).hexdigest()
+
+
+cache = None
 
-def parse_all(directory, output_csv: str = "") -> pd.DataFrame:
-    all_files = get_all_files(directory)
-    results = []
 
-    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
-        futures = {executor.submit(parse_inst, f): f for f in all_files}
-        for future in tqdm(as_completed(futures), total=len(futures), smoothing=0.0):
-            results.append(future.result())
+def get_cache() -> ParseCache:
+    global cache
+    if cache is None:
+        cache = ParseCache(f"{logs}/parse.sqlite", parser_version())
+    return cache
 
-    df = pd.concat(results, ignore_index=True)
+
+def cached_record(log_file) -> dict:
+    """
+    The record of the log, parsing it only if it is not in the cache.
+    """
+    d = get_cache().get(log_file)
+    if d is None:
+        d = parse_record(log_file)
+        get_cache().put(log_file, d)
+    return d
+
+
+def parse_inst(log_file) -> dict:
+    """
+    The record of the log. It is checked with the rest of its table, see
+    utils.checker.
+    """
+    return cached_record(log_file)
+
+
+def parse_all(directory, output_csv: str = "", processes=True) -> "pd.DataFrame":
+    from tqdm import tqdm
+
+    import utils.checker as checker
+
+    all_files = get_all_files(directory)
+    records = {f: get_cache().get(f) for f in all_files}
+    missing = [f for f, d in records.items() if d is None]
+
+    parsed = pmap(parse_record, missing, processes=processes)
+    for f, d in tqdm(zip(missing, parsed), total=len(missing), smoothing=0.0):
+        get_cache().put(f, d)
+        records[f] = d
+    get_cache().flush()
+
+    df = to_frame(list(records.values()))
+    s = checker.messages(checker.check(df))
+    if s:
+        print(*s, sep="\n")
     if output_csv:
         df.to_csv(output_csv, index=False)
 
@@ -73,4 +137,9 @@ def parse_all(directory, output_csv: str = "") -> pd.DataFrame:
 
 
 if __name__ == "__main__":
-    parse_all(sys.argv[1], sys.argv[2])
+    args = arg_parser.parse_args()
+    parse_all(args.directory, args.output_csv)
+    if args.trajectories:
+        import utils.trajectory as trajectory
+
+        trajectory.collect(args.directory, args.trajectories)
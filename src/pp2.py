@@ -6,19 +6,15 @@ Script to generate the Performance Profile.
 # TODO histograma da variação do tempo entre dois dados
 # https://github.com/garrettj403/SciencePlots
 
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
 import argparse
 import os
-import scienceplots
-import seaborn as sns
 
-plt.style.use("science")
-plt.style.use("~/mest/script/src/dis.mplstyle")
+import matplotlib.pyplot as plt
+import pandas as pd
 
 import conf
 from utils.utils import get_instances_from_set
+import utils.plots as plots
 
 # Determine instance directory based on OS
 if os.uname().sysname == "Darwin":
@@ -38,156 +34,18 @@ parser.add_argument(
     default="all",
     help="Instance set to filter the results. Default is all.",
 )
-args = parser.parse_args()
-
-
-# Function to load instances from files
-def load_and_filter_results(file_path, instances):
-    df = pd.read_csv(file_path)
-    df = df[df["instance"].isin(instances)]
-    return df
-
-
-# Function to get solved times from results
-def get_solved_times(df):
-    # for each line, return time if lb == ub and lb > 0
-    # otherwise, return NaN
-    return df.apply(
-        lambda x: (
-            min(x["time"], 3600) if x["lb"] == x["ub"] and x["lb"] > 0 else 4000
-        ),
-        axis=1,
-    )
-
-
-def get_gap(df):
-    # if df["lb"].astype(float) > 0: gap = (ub - lb) / lb
-    # else: gap = ub / 2
-    # set as float64
-    return df.apply(
-        lambda x: (
-            (x["ub"] - x["lb"]) / x["lb"]
-            if x["lb"] != "" and x["ub"] != "" and x["lb"] > 0
-            else x["ub"] / 2 if x["ub"] != "" else 200
-        ),
-        axis=1,
-    )
-
-
-# Get intersection of instances across all files
-def get_common_instances(results):
-    instance_sets = [set(df["instance"]) for df in results.values()]
-    return set.intersection(*instance_sets)
-
-
-# Plot cumulative distribution using pandas
-def plot_cumulative(data, axis, n_instances, label=None, max=None):
-    # sns.ecdfplot(data, ax=axis, label=label)
-    data = np.sort(data)
-    y = np.arange(len(data)) / n_instances
-    axis.plot(data, y, label=label, drawstyle="steps-post")
+# =============================================================================
 
 
 if __name__ == "__main__":
+    args = parser.parse_args()
+    plots.style()
+
     # Load instance set based on configuration
     inst = get_instances_from_set(inst_dir, args.instance_set)
-    n_inst = len(inst)
-
-    results = {}  # Store results as {filename: DataFrame}
-    max_time = 0.0
-
-    # Process each file
-    for f in args.files:
-        file_name = os.path.splitext(os.path.basename(f))[0]
-        print(f"{f.split("/")[-1].replace(".csv", ""):^25}...", end=" ")
-
-        # Load and filter data
-        df = load_and_filter_results(f, inst)
-        # filter to those that have ub > 3
-        df = df[df["ub"] > 3]
-        results[file_name] = df
-
-        # Calculate maximum time
-        tl = df["time"].apply(pd.to_numeric, errors="coerce").max()
-        print(f"TL ~{tl:4.0f} | {len(df)} instances")
-        max_time = max(max_time, tl)
-
-    # Get common instances across all files
-    inst = get_common_instances(results)
-    n_inst = len(inst)
-    results = {name: df[df["instance"].isin(inst)] for name, df in results.items()}
-
-    print("Common instances:", n_inst)
-
-    # for each instance, get the min time between the compared algorithms
-    min_times = {
-        instance: min(
-            [
-                df[df["instance"] == instance]["time"].values[0]
-                for df in results.values()
-            ]
-        )
-        for instance in inst
-    }
-    # === Plotting time x cumulative probability ===============================
-    fig, axs = plt.subplots(1, 2, figsize=(16, 9), gridspec_kw={"width_ratios": [7, 4]})
-
-    axs[0].set_ylim(0.0, 1.0)
-
-    axs[0].grid(axis="y", linestyle="--", alpha=0.7)
-    axs[0].spines["right"].set_visible(False)
-
-    axs[0].set_xscale("log")
-    axs[0].set_xlabel("Time (s)")
-    axs[0].set_xlim(1, 200)  # or max_time
-    axs[0].grid(axis="x", linestyle="--", alpha=0.7)
-
-    # Plot solved instances cumulative distribution
-    for name, df in results.items():
-        rank = get_solved_rank(df, min_times)
-        if "held" in name:
-            name = "Held et al."
-        else:
-            name = "Ours"
-        plot_cumulative(rank, axis=axs[0], label=name, n_instances=n_inst, max=3600)
-
-    # === Plotting gap x cumulative probability ================================
-    axs[1].set_ylim(0.0, 1.0)
-    axs[1].grid(axis="y", linestyle="--", alpha=0.7)
-    # axs[1].yaxis.set_visible(False)
-    axs[1].tick_params(axis="y", which="both", left=False, right=True, labelsize=False)
-
-    axs[1].spines["left"].set_visible(False)
-
-    axs[1].set_xscale("log")
-    axs[1].set_xlabel("Gap")
-    gap_xlim_min = 0.004
-    gap_xlim_max = 10.3
-    axs[1].set_xlim(gap_xlim_min, gap_xlim_max)
-    axs[1].grid(axis="x", linestyle="--", alpha=0.7)
-
-    # Plot solved instances cumulative distribution
-    for name, df in results.items():
-        gap = get_gap(df)
-        # if exists a 0 < gap < 0.0036:
-        if len(gap[(0 < gap) & (gap < gap_xlim_min)]) > 0:
-            print(
-                f"File {name} has {len(gap[gap < 0.0036])} instances with gap < {gap_xlim_min}."
-            )
-        if len(gap[gap > gap_xlim_max]) > 0:
-            print(
-                f"File {name} has {len(gap[gap > 10.0])} instances with gap > {gap_xlim_max}."
-            )
-            print(max(gap))
-
-        if "held" in name:
-            name = "Held et al."
-        else:
-            name = "Ours"
-        plot_cumulative(gap, axis=axs[1], label=name, n_instances=n_inst)
+    results = {os.path.splitext(os.path.basename(f))[0]: pd.read_csv(f) for f in args.files}
 
-    axs[1].legend(loc="lower right")
-    plt.subplots_adjust(wspace=0)
+    plots.perf(results, inst)
     plt.show()
 
-    # plt.savefig(f"/Users/ieremies/mest/write/dis/img/pp-{args.instance_set}.svg")
+    # plt.savefig(f"{conf.figures}/pp-{args.instance_set}.svg")
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Script to race builds against each other, in the style of F-race.
+
+Every surviving build runs on a stratified subset of the instances (the same
+number from each instance set). Builds that are significantly worse than
+the best one are dropped, and the survivors move on to a larger subset with
+a longer time limit. Logs are reused through runner.run_jobs, so instances
+already run (long enough) are never run again.
+
+A reused log may have run for longer than the round's limit. It is scored
+as it was at the limit (see `at_limit`), so builds with old long logs get
+no advantage.
+"""
+import argparse
+import random
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+import conf
+from runner import run_jobs, inst, logs
+from utils.utils import get_instances_from_set
+import utils.trajectory as trajectory
+
+# === Argument parsing ========================================================
+arg_parser = argparse.ArgumentParser(description="Race builds on instance sets.")
+arg_parser.add_argument(
+    "builds", metavar="builds", type=str, nargs="+", help="Builds to race"
+)
+arg_parser.add_argument(
+    "-i",
+    "--instance_set",
+    type=str,
+    default="easy+medium+dimacsreduced",
+    help="Instance sets, each one is a stratum of the subsets.",
+)
+arg_parser.add_argument(
+    "-n", type=int, default=5, help="Instances per set on the first round."
+)
+arg_parser.add_argument(
+    "-tl",
+    dest="time_limit",
+    type=int,
+    default=10,
+    help="Time limit of the first round.",
+)
+arg_parser.add_argument(
+    "--growth",
+    type=float,
+    default=2.0,
+    help="Factor by which the subset and time limit grow each round.",
+)
+arg_parser.add_argument(
+    "--max-tl",
+    type=int,
+    default=conf.time_limit,
+    help="Time limit cap, default is the one in conf.",
+)
+arg_parser.add_argument(
+    "--alpha", type=float, default=0.05, help="Significance level of the tests."
+)
+arg_parser.add_argument("--seed", type=int, default=0, help="Seed of the subsets.")
+arg_parser.add_argument(
+    "-o", dest="output_csv", type=str, default="race.csv", help="Scores of every run."
+)
+# =============================================================================
+
+
+def strata(inst_set: str, seed: int) -> list[list[str]]:
+    """
+    The instances of each set, in a fixed random order. Taking a prefix of
+    each gives nested subsets, so later rounds include the earlier ones.
+    """
+    rng = random.Random(seed)
+    groups = []
+    for s in inst_set.split("+"):
+        group = sorted(get_instances_from_set(inst, s))
+        rng.shuffle(group)
+        groups.append(group)
+    return groups
+
+
+def at_limit(d: dict | None, log_file: str, tl: float) -> dict | None:
+    """
+    The record of a run as if it had been stopped at `tl`. Runs that ended
+    after it, or ran with a longer limit, are unsolved at `tl` and their
+    bounds are those of their trajectory at that time.
+    """
+    if d is None:
+        return None
+    t = d.get("time")
+    if (d.get("tl") or tl) <= tl and (t is None or t <= tl):
+        return d
+
+    lb, ub = trajectory.bounds_at(*trajectory.extract(log_file), tl)
+    bound = lambda b: None if np.isnan(b) else int(b)
+    return d | {
+        "lb": bound(lb),
+        "ub": bound(ub),
+        "time": t if t is not None and t <= tl else None,
+    }
+
+
+def score(d: dict | None, tl: float) -> float:
+    """
+    Time if solved within tl, otherwise the time limit plus the relative
+    gap, so any solved run beats an unsolved one and smaller gaps are better.
+    """
+    if d is None:
+        return 2.0 * tl
+    lb, ub, t = d.get("lb"), d.get("ub"), d.get("time")
+    if lb not in (None, "") and lb == ub and t is not None and t <= tl:
+        return t
+    if lb in (None, "") or ub in (None, ""):
+        return 2.0 * tl
+    return tl * (1.0 + (float(ub) - float(lb)) / float(ub))
+
+
+def eliminate(scores: pd.DataFrame, alpha: float) -> list[str]:
+    """
+    The builds (columns) that are significantly worse than the best one, with
+    instances as blocks. First a Friedman test over all builds (if more than
+    two), then one-sided Wilcoxon tests against the best, Holm-corrected.
+    """
+    builds = list(scores.columns)
+    if len(builds) < 2 or len(scores) < 5 or (scores.nunique(axis=1) == 1).all():
+        return []
+
+    ranks = scores.rank(axis=1).mean()
+    print(ranks.sort_values().to_string(float_format="{:.2f}".format))
+    if len(builds) > 2:
+        p = stats.friedmanchisquare(*scores.T.values).pvalue
+        if not p < alpha:  # also when p is NaN, e.g. every run tied
+            return []
+
+    best = ranks.idxmin()
+    pvalues = {}
+    for b in builds:
+        if b == best:
+            continue
+        diff = scores[b] - scores[best]
+        if not np.any(diff):
+            pvalues[b] = 1.0
+            continue
+        pvalues[b] = stats.wilcoxon(diff, alternative="greater").pvalue
+
+    # Holm: the k-th smallest p-value is compared with alpha / (m - k)
+    worse = []
+    for k, (b, p) in enumerate(sorted(pvalues.items(), key=lambda x: x[1])):
+        if p >= alpha / (len(pvalues) - k):
+            break
+        worse.append(b)
+    return worse
+
+
+def race(builds, inst_set, n, tl, growth, max_tl, alpha, seed, output_csv=""):
+    groups = strata(inst_set, seed)
+    survivors = list(builds)
+    rows = []
+
+    size, r = n, 0
+    while True:
+        subset = [i for g in groups for i in g[: int(size)]]
+        tl = min(tl, max_tl)
+        print(f"=== Round {r}: {len(survivors)} builds, {len(subset)} instances, tl {tl}s")
+
+        results = run_jobs(survivors, subset, tl)
+        results = {
+            (b, i): at_limit(d, f"{logs}/tmp/{b}/{i}.log", tl)
+            for (b, i), d in results.items()
+        }
+        scores = pd.DataFrame(
+            {b: [score(results.get((b, i)), tl) for i in subset] for b in survivors},
+            index=subset,
+        )
+        rows.append(scores.assign(round=r, tl=tl))
+
+        worse = eliminate(scores, alpha)
+        for b in worse:
+            print(f"❌ {b} is worse than the best.")
+        survivors = [b for b in survivors if b not in worse]
+
+        done = all(size >= len(g) for g in groups) and tl >= max_tl
+        if len(survivors) == 1 or done:
+            break
+        size, tl, r = size * growth, int(tl * growth), r + 1
+
+    if output_csv:
+        df = pd.concat(rows).rename_axis("instance").reset_index()
+        df.to_csv(output_csv, index=False)
+
+    print("Survivors:", *survivors)
+    return survivors
+
+
+if __name__ == "__main__":
+    args = arg_parser.parse_args()
+    race(
+        args.builds,
+        args.instance_set,
+        args.n,
+        args.time_limit,
+        args.growth,
+        args.max_tl,
+        args.alpha,
+        args.seed,
+        args.output_csv,
+    )
@@ -5,15 +5,16 @@ Script to run a build in a instance set.
 import argparse
 import os
 import subprocess
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from parser import parse_inst
-
-import pandas as pd
-from tqdm import tqdm
+import time
+from parser import parse_inst, parse_record, cached_record, get_cache
 
 import conf
+import utils.parse_functions as pf
 from utils.utils import get_instances_from_set, get_n_jobs
-import utils.checker
+from utils.topology import placement
+from utils.records import to_frame
+import utils.schedule as schedule
+import utils.engine as engine
 
 # === Argument parsing ========================================================
 arg_parser = argparse.ArgumentParser(description="Help running my code.")
@@ -21,7 +22,8 @@ arg_parser.add_argument(
     "build",
     type=str,
     default=conf.default_build,
-    help=f"Which build to run, default is {conf.default_build}",
+    help=f"Which build to run, default is {conf.default_build}. "
+    "Several builds (a.e+b.e) run together on the same workers.",
 )
 arg_parser.add_argument(
     "inst_set",
@@ -42,6 +44,44 @@ arg_parser.add_argument(
     default=False,
     help="Force the execution of the build.",
 )
+arg_parser.add_argument(
+    "--no-pin",
+    dest="pin",
+    action="store_false",
+    default=True,
+    help="Do not pin each run to its own physical core.",
+)
+arg_parser.add_argument(
+    "--siblings",
+    action="store_true",
+    default=False,
+    help="Give each run every hyperthread of its core, instead of leaving the "
+    "siblings idle.",
+)
+arg_parser.add_argument(
+    "--history",
+    type=str,
+    nargs="*",
+    default=[],
+    help="Previous result CSVs to estimate the runtimes from.",
+)
+arg_parser.add_argument(
+    "--escalate",
+    dest="cap",
+    type=int,
+    default=None,
+    help="Run the timeouts again, doubling the time limit up to this cap.",
+)
+arg_parser.add_argument(
+    "--shard",
+    type=schedule.parse_shard,
+    default=None,
+    help="Run only the i-th of k shards (i/k) of the instances, split by their "
+    "expected runtime. Every machine must be given the same --history.",
+)
+arg_parser.add_argument(
+    "--seed", type=int, default=None, help="Seed of the order of the instances."
+)
 arg_parser.add_argument(
     "--clean",
     action="store_true",
@@ -84,49 +124,70 @@ def run_instance(build, instance, tl=conf.time_limit, force=False):
     """
     Run a single instance with the given build.
     """
-    cmd = conf.cmd.format(
-        code=code, build=build, inst_set=f"{inst}/all", instance=instance
-    )
-    log_file = f"{logs}/tmp/{build}/{instance}.log"
+    job = make_job(build, instance, tl, force)
+    log_file = job.log_file
 
     # if log_file exists
-    if force or not os.path.exists(log_file):
-        with open(log_file, "w") as fd:
-            try:
-                subprocess.run(cmd.split(), timeout=tl, stdout=fd, stderr=fd, text=True)
-            except subprocess.TimeoutExpired:
-                pass
-            except Exception as _:
-                print(f"❌ {instance}")
-                return
+    if job.run:
+        try:
+            engine.execute_sync(job.cmd, log_file, tl)
+        except Exception as _:
+            print(f"❌ {instance}")
+            return
 
     try:
-        df = parse_inst(log_file)
+        return parse_inst(log_file)
     except:
         print(f"Error while parsing {instance}")
         return
-    return df
 
 
-def run(build, inst_set, tl=conf.time_limit, force=False, output_csv="tmp.csv"):
-    if not os.path.exists(f"{logs}/tmp"):
-        os.makedirs(f"{logs}/tmp")
+def make_job(build, instance, tl=conf.time_limit, force=False) -> engine.Job:
+    """
+    The job running the instance with the given build, which only parses the
+    log if it already exists.
+    """
+    cmd = conf.cmd.format(
+        code=code, build=build, inst_set=f"{inst}/all", instance=instance
+    )
+    log_file = f"{logs}/tmp/{build}/{instance}.log"
+    run = force or needs_run(log_file, tl)
+    return engine.Job((build, instance), cmd.split(), log_file, tl, run)
 
-    if not os.path.exists(f"{logs}/tmp/{build}"):
-        os.makedirs(f"{logs}/tmp/{build}")
 
-    # get instances from the given set
-    instances = get_instances_from_set(inst, inst_set)
-    print(len(instances))
+def needs_run(log_file, tl) -> bool:
+    """
+    Whether the log must be (re)made for this time limit. A log is reused if
+    the run finished, or if it ran for at least as long as `tl`. Logs made
+    before the harness recorded the time limit are always reused.
+
+    Only the atexit and harness lines at the end of the log are read, not
+    the whole record: after any change to the parser, a full parse here
+    would re-read every old log serially, before the engine even starts.
+    """
+    if not os.path.exists(log_file):
+        return True
+
+    log = pf.scan(log_file, {"atexit": pf.LAST, "harness: ": pf.LAST})
+    d = {**pf.get_time(log), **pf.get_usage(log)}
+    return not finished(d) and d.get("tl") is not None and d["tl"] < tl
+
+
+def finished(d: dict) -> bool:
+    """
+    Whether the run ended by itself (it has the atexit line), instead of
+    being killed at the time limit.
+    """
+    return d["time"] is not None
+
 
-    results = []
-    workers = get_n_jobs() if not "debug" in build else os.cpu_count()
-    with ThreadPoolExecutor(max_workers=workers) as ex:
-        f2e = {ex.submit(run_instance, build, i, tl, force): i for i in instances}
-        for future in tqdm(as_completed(f2e), total=len(f2e), smoothing=0.0):
-            results.append(future.result())
+def report(build, results: list[dict], output_csv: str = ""):
+    """
+    Save and summarize the results of a build.
+    """
+    import utils.checker as checker
 
-    df = pd.concat(results, ignore_index=True)
+    df = to_frame(results)
     df = df.drop(columns=["errors", "warnings"])
     if output_csv:
         df.to_csv(output_csv, index=False)
@@ -134,13 +195,12 @@ def run(build, inst_set, tl=conf.time_limit, force=False, output_csv="tmp.csv"):
     # cmd = f"tar -czf {logs}/{build}.tar.gz {logs}/tmp/{build}"
     # subprocess.run(cmd.split())
 
-    for i in df.iterrows():
-        s = utils.checker.check(dict(i[1]))
-        if s:
-            print(*s, sep="\n")
+    s = checker.messages(checker.check(df))
+    if s:
+        print(*s, sep="\n")
 
-    print("-" * 18)
-    no_lb = df[df["lb"] == ""].shape[0]
+    print(f"--- {build} " + "-" * max(0, 14 - len(build)))
+    no_lb = df[df["lb"].isna()].shape[0]
     solved = df[df["lb"] == df["ub"]].shape[0]
     total_time = df["time"].sum()
     print(f"Without LB : {no_lb}")
@@ -148,15 +208,174 @@ def run(build, inst_set, tl=conf.time_limit, force=False, output_csv="tmp.csv"):
     print(f"Total time : {total_time:.2f}s")
 
 
+def output_of(build, shard=None) -> str:
+    """
+    The CSV of the build, or of one of its shards, e.g. a.e -> a.2-4.csv.
+    """
+    if shard:
+        return build.replace(".e", f".{shard[0]}-{shard[1]}.csv")
+    return build.replace(".e", ".csv")
+
+
+def run_matrix(
+    builds: list[str],
+    inst_set,
+    tl=conf.time_limit,
+    force=False,
+    outputs: dict | None = None,
+    pin=True,
+    history=(),
+    cap=None,
+    factor=2,
+    shard=None,
+    seed=None,
+    siblings=False,
+):
+    """
+    Run every build on the instance set, all (build, instance) runs sharing
+    the same workers. Each build is saved to outputs[build], by default its
+    name with .csv instead of .e.
+
+    With a `cap`, runs that time out are run again with the time limit
+    multiplied by `factor`, up to the cap (see run_escalating).
+
+    With a `shard` (i, k), only the i-th of k parts of the instances is run.
+    The parts are split by the runtimes expected from `history` (not from
+    the outputs, which differ between machines), so they take about the
+    same time and every machine agrees on them.
+    """
+    outputs = outputs or {b: output_of(b, shard) for b in builds}
+
+    # get instances from the given set
+    instances = get_instances_from_set(inst, inst_set, seed)
+    if shard:
+        expected = schedule.expected_runtimes(instances, tl, inst, history)
+        instances = schedule.shard(instances, *shard, expected)
+    print(len(instances))
+
+    history = {b: [*history, outputs[b]] if outputs[b] else history for b in builds}
+    pairs = [(b, i) for b in builds for i in instances]
+    if cap:
+        results = run_escalating(pairs, tl, cap, factor, force, pin, history, siblings)
+    else:
+        results = run_pairs(pairs, tl, force, pin, history, siblings)
+
+    for build in builds:
+        records = [results.get((build, i)) for i in instances]
+        report(build, [r for r in records if r is not None], outputs[build])
+
+
+def run_escalating(
+    pairs, tl, cap, factor=2, force=False, pin=True, history=None, siblings=False
+):
+    """
+    Run every (build, instance) with the time limit `tl`, then again only
+    those that timed out, with the limit multiplied by `factor` each time,
+    until the `cap`. Each record gets the limit it finished with, as
+    `resolved_tl` (None if it never did).
+
+    A timeout whose log already ran for longer than the next limit (or the
+    cap) is left as is until the limit passes it.
+    """
+    results = {}
+    pending = list(pairs)
+    while True:
+        if pending:
+            print(f"=== {len(pending)} runs with tl {tl}s")
+            for key, d in run_pairs(pending, tl, force, pin, history, siblings).items():
+                if d is not None:
+                    d["resolved_tl"] = (d.get("tl") or tl) if finished(d) else None
+                results[key] = d
+
+        timeouts = [k for k, d in results.items() if d and not finished(d)]
+        if not timeouts or tl >= cap:
+            break
+        # The logs of timeouts are always redone, even those made before the
+        # harness recorded their limit
+        tl, force = min(cap, tl * factor), True
+        pending = [k for k in timeouts if (results[k].get("tl") or 0) < tl]
+    return results
+
+
+def run_jobs(
+    builds, instances, tl, force=False, pin=True, history=None, siblings=False
+) -> dict:
+    """
+    Run every build on every instance, see run_pairs.
+    """
+    pairs = [(b, i) for b in builds for i in instances]
+    return run_pairs(pairs, tl, force, pin, history, siblings)
+
+
+def run_pairs(pairs, tl, force=False, pin=True, history=None, siblings=False) -> dict:
+    """
+    Run the (build, instance) pairs on shared workers. Existing logs are
+    reused (see needs_run) unless forced. Returns {(build, instance): record}.
+    `history` maps each build to the CSVs its runtimes are estimated from.
+    With `siblings`, each run is pinned to every hyperthread of its core,
+    otherwise only to the main one and the others stay idle.
+    """
+    history = history or {}
+    builds = sorted({b for b, _ in pairs})
+    for build in builds:
+        os.makedirs(f"{logs}/tmp/{build}", exist_ok=True)
+
+    debug = all("debug" in b for b in builds)
+    workers = get_n_jobs() if not debug else os.cpu_count()
+    cores = placement(workers, siblings) if pin else None
+    workers = len(cores) if cores else workers
+
+    # Longest expected runs first
+    jobs, expected = [], {}
+    for build in builds:
+        instances = [i for b, i in pairs if b == build]
+        est = schedule.expected_runtimes(instances, tl, inst, history.get(build, []))
+        for i in instances:
+            jobs.append(make_job(build, i, tl, force))
+            expected[(build, i)] = est[i] if jobs[-1].run else 0.0
+    jobs.sort(key=lambda j: expected[j.key], reverse=True)
+    durations = [expected[j.key] for j in jobs if j.run]
+    predicted = schedule.makespan(durations, workers, tl)
+
+    start = time.monotonic()
+    results = engine.run(jobs, workers, parse_record, get_cache(), cores=cores)
+    achieved = time.monotonic() - start
+    # Without any history the estimates are file sizes, not times
+    if any(os.path.exists(f) for files in history.values() for f in files):
+        print(f"Makespan   : {achieved:.2f}s (predicted {predicted:.2f}s)")
+    else:
+        print(f"Makespan   : {achieved:.2f}s (no history to predict it)")
+    return results
+
+
+def run(
+    build,
+    inst_set,
+    tl=conf.time_limit,
+    force=False,
+    output_csv="tmp.csv",
+    pin=True,
+    history=(),
+):
+    run_matrix([build], inst_set, tl, force, {build: output_csv}, pin, history)
+
+
 if __name__ == "__main__":
     args = arg_parser.parse_args()
+    builds = args.build.split("+")
     if args.clean:
-        clean_logs(args.build)
+        for b in builds:
+            clean_logs(b)
     else:
-        run(
-            args.build,
+        run_matrix(
+            builds,
             args.inst_set,
             args.time_limit,
             args.force,
-            output_csv=args.build.replace(".e", ".csv"),
+            pin=args.pin,
+            history=args.history,
+            cap=args.cap,
+            shard=args.shard,
+            seed=args.seed,
+            siblings=args.siblings,
         )
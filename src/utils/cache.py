@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+On-disk caches of parsed logs and rendered figures.
+
+Each log is stored with its size, mtime and the version of the parser that
+read it. A log is only parsed again if any of those changed.
+"""
+import atexit
+import json
+import os
+import sqlite3
+import threading
+
+
+class ParseCache:
+    def __init__(self, path: str, version: str, commit_every: int = 100):
+        self.version = version
+        self.commit_every = commit_every
+        self.pending = 0
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS logs ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER, mtime INTEGER, version TEXT, record TEXT)"
+        )
+        atexit.register(self.flush)
+
+    @staticmethod
+    def key(log_file: str) -> tuple[str, int, int]:
+        st = os.stat(log_file)
+        return os.path.abspath(log_file), st.st_size, st.st_mtime_ns
+
+    def get(self, log_file: str) -> dict | None:
+        """
+        Return the cached record of the log, or None if it must be parsed.
+        """
+        try:
+            path, size, mtime = self.key(log_file)
+        except OSError:
+            return None
+
+        with self.lock:
+            row = self.db.execute(
+                "SELECT size, mtime, version, record FROM logs WHERE path = ?",
+                (path,),
+            ).fetchone()
+        if row is None or tuple(row[:3]) != (size, mtime, self.version):
+            return None
+        return json.loads(row[3])
+
+    def put(self, log_file: str, record: dict):
+        try:
+            path, size, mtime = self.key(log_file)
+        except OSError:
+            return
+
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO logs VALUES (?, ?, ?, ?, ?)",
+                (path, size, mtime, self.version, json.dumps(record)),
+            )
+            self.pending += 1
+            if self.pending >= self.commit_every:
+                self.db.commit()
+                self.pending = 0
+
+    def flush(self):
+        with self.lock:
+            self.db.commit()
+            self.pending = 0
+
+
+class FigureCache:
+    """
+    The key (hash of the inputs) each figure was last rendered from, so a
+    figure is only rendered again if its key changed or the file is gone.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS figures (path TEXT PRIMARY KEY, key TEXT)"
+        )
+
+    def fresh(self, figure_file: str, key: str) -> bool:
+        path = os.path.abspath(figure_file)
+        if not os.path.exists(path):
+            return False
+        row = self.db.execute(
+            "SELECT key FROM figures WHERE path = ?", (path,)
+        ).fetchone()
+        return row is not None and row[0] == key
+
+    def put(self, figure_file: str, key: str):
+        self.db.execute(
+            "INSERT OR REPLACE INTO figures VALUES (?, ?)",
+            (os.path.abspath(figure_file), key),
+        )
+        self.db.commit()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Persistent catalog of the instances, so the instance directory is not
+walked (and every link resolved) on each call.
+
+The catalog is an SQLite file on local disk, one per instance directory
+(see `default_path`), with
+
+    files(path, name, size, mtime, n, m, hash)   one row per real file
+    members(set, name, path)                    which instances each set has
+    dirs(set, path, mtime)                      the directories of each set
+    stats(hash, ...)                            see utils.dimacs.stats
+    features(hash, ...)                         see utils.features
+
+A set is walked again only if the mtime of one of its directories changed
+(a link was added or removed). Otherwise each of its files is only stat'd,
+as they can be rewritten in place without touching the directories, and
+read again only if its size or mtime changed.
+
+It is not kept in the instance directory: that is shared over NFS by
+every machine, and SQLite's locking (let alone WAL) is not safe there.
+Each machine keeps its own catalog instead, which the mtimes keep in sync.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+
+# Graph statistics, filled by utils.dimacs.index. The n and m of a query are
+# those of the header, which do not need the stats.
+STATS = {
+    "density": "REAL",
+    "min_degree": "INTEGER",
+    "max_degree": "INTEGER",
+    "mean_degree": "REAL",
+    "std_degree": "REAL",
+    "components": "INTEGER",
+    "components_complement": "INTEGER",
+}
+
+# Spectral features, filled by utils.features.index
+FEATURES = {
+    "algebraic_connectivity": "REAL",
+    "energy": "REAL",
+}
+
+# The tables computed from the content of each file, by its hash
+TABLES = {"stats": STATS, "features": FEATURES}
+
+# Columns that can be used in a query
+COLUMNS = ("name", "path", "size", "n", "m", "hash", *STATS, *FEATURES)
+CONDITION = re.compile(r"^\s*(\w+)\s*(<=|>=|==|!=|=|<|>)\s*(\S+)\s*$")
+
+
+def header(path: str) -> tuple[int | None, int | None]:
+    """
+    Vertices and edges from the "p edge n m" line of a DIMACS file.
+    """
+    with open(path, "rb") as fd:
+        for line in fd:
+            if line.startswith(b"p"):
+                parts = line.split()
+                return int(parts[2]), int(parts[3])
+            if not line.startswith(b"c") and line.strip():
+                break
+    return None, None
+
+
+def content_hash(path: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fd:
+        while chunk := fd.read(1 << 20):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def qualified(col: str) -> str:
+    for table, columns in TABLES.items():
+        if col in columns:
+            return f"{table}.{col}"
+    return f"f.{col}"
+
+
+def where(conditions: str) -> tuple[str, list]:
+    """
+    Turn "n > 500, m <= 10000" (or with "and") into a SQL WHERE clause and
+    its parameters. Only the COLUMNS and comparisons are accepted.
+    """
+    clauses, params = [], []
+    for cond in re.split(r",|\band\b", conditions or ""):
+        if not cond.strip():
+            continue
+        match = CONDITION.match(cond)
+        if match is None or match[1] not in COLUMNS:
+            raise ValueError(f"Invalid condition: {cond.strip()!r}")
+        col, op, value = match.groups()
+        clauses.append(f"{qualified(col)} {'=' if op == '==' else op} ?")
+        try:
+            params.append(float(value))
+        except ValueError:
+            params.append(value.strip("'\""))
+    return " AND ".join(clauses) or "1", params
+
+
+def default_path(inst_dir: str) -> str:
+    """
+    ~/.cache/mest/catalog-<hash of the instance directory>.sqlite
+    """
+    key = hashlib.blake2b(os.path.abspath(inst_dir).encode(), digest_size=8)
+    return os.path.expanduser(f"~/.cache/mest/catalog-{key.hexdigest()}.sqlite")
+
+
+class Catalog:
+    def __init__(self, inst_dir: str, path: str | None = None):
+        self.inst_dir = inst_dir
+        self.lock = threading.Lock()
+        path = path or default_path(inst_dir)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+        except (OSError, sqlite3.OperationalError):
+            # e.g. no writable home, then it only lasts this run
+            self.db = sqlite3.connect(":memory:", check_same_thread=False)
+        self.db.executescript(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY, name TEXT, size INTEGER, mtime INTEGER,"
+            " n INTEGER, m INTEGER, hash TEXT);"
+            "CREATE TABLE IF NOT EXISTS members ("
+            " \"set\" TEXT, name TEXT, path TEXT, PRIMARY KEY (\"set\", path));"
+            "CREATE TABLE IF NOT EXISTS dirs ("
+            " \"set\" TEXT, path TEXT, mtime INTEGER, PRIMARY KEY (\"set\", path));"
+        )
+        for table, columns in TABLES.items():
+            self.db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (hash TEXT PRIMARY KEY, "
+                + ", ".join(f"{c} {t}" for c, t in columns.items())
+                + ")"
+            )
+
+    def stale(self, inst_set: str) -> bool:
+        rows = self.db.execute(
+            'SELECT path, mtime FROM dirs WHERE "set" = ?', (inst_set,)
+        ).fetchall()
+        if not rows:
+            return True
+        for path, mtime in rows:
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def update_file(self, path: str, full=False):
+        """
+        Read the file again if it changed since it was cataloged.
+        """
+        st = os.stat(path)
+        row = self.db.execute(
+            "SELECT size, mtime FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        if not full and row is not None and tuple(row) == (st.st_size, st.st_mtime_ns):
+            return
+        try:
+            n, m = header(path)
+        except (OSError, ValueError, IndexError):
+            n, m = None, None
+        self.db.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                path,
+                os.path.basename(path),
+                st.st_size,
+                st.st_mtime_ns,
+                n,
+                m,
+                content_hash(path),
+            ),
+        )
+
+    def update_set(self, inst_set: str, full=False):
+        """
+        Walk the set's directory, as get_all_files does, and catalog it.
+        """
+        dirs, paths = {}, []
+        for root, _, files in os.walk(f"{self.inst_dir}/{inst_set}"):
+            dirs[root] = os.stat(root).st_mtime_ns
+            for name in files:
+                paths.append(os.path.realpath(os.path.join(root, name)))
+
+        self.db.execute('DELETE FROM members WHERE "set" = ?', (inst_set,))
+        self.db.execute('DELETE FROM dirs WHERE "set" = ?', (inst_set,))
+        for path in paths:
+            try:
+                self.update_file(path, full)
+            except OSError:
+                continue  # a broken link
+            self.db.execute(
+                "INSERT OR IGNORE INTO members VALUES (?, ?, ?)",
+                (inst_set, os.path.basename(path), path),
+            )
+        self.db.executemany(
+            "INSERT INTO dirs VALUES (?, ?, ?)",
+            [(inst_set, d, mtime) for d, mtime in dirs.items()],
+        )
+        self.db.commit()
+
+    def update_files(self, inst_set: str) -> bool:
+        """
+        Read the files of the set that changed since they were cataloged,
+        without walking it. False if one of them is gone.
+        """
+        paths = self.db.execute(
+            'SELECT path FROM members WHERE "set" = ?', (inst_set,)
+        ).fetchall()
+        for (path,) in paths:
+            try:
+                self.update_file(path)
+            except OSError:
+                return False
+        self.db.commit()
+        return True
+
+    def refresh(self, sets: str, full=False):
+        """
+        Update the sets whose directories or files changed, or all of them
+        if `full`, reading every file again.
+        """
+        with self.lock:
+            for s in sets.split("+"):
+                if full or self.stale(s) or not self.update_files(s):
+                    self.update_set(s, full)
+
+    def query(self, sets: str, conditions: str = "", columns=("name",)) -> list:
+        """
+        The instances in any of the sets ("easy+medium") satisfying the
+        conditions ("n > 500, m < 10000"), as tuples of the columns, or
+        only the names if that is the only column.
+        """
+        self.refresh(sets)
+        clause, params = where(conditions)
+        sets = sets.split("+")
+        cols = ", ".join(qualified(c) for c in columns)
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT DISTINCT {cols} FROM members i JOIN files f ON i.path = f.path"
+                + "".join(f" LEFT JOIN {t} ON f.hash = {t}.hash" for t in TABLES)
+                + f' WHERE i."set" IN ({", ".join("?" * len(sets))}) AND {clause}'
+                " ORDER BY f.name",
+                [*sets, *params],
+            ).fetchall()
+        if tuple(columns) == ("name",):
+            return [r[0] for r in rows]
+        return rows
+
+    def missing(self, sets: str, table: str) -> list[tuple[str, str]]:
+        """
+        The (path, hash) of the instances in the sets without a row in the
+        table (one of TABLES).
+        """
+        self.refresh(sets)
+        sets = sets.split("+")
+        with self.lock:
+            return self.db.execute(
+                "SELECT DISTINCT f.path, f.hash FROM members i"
+                f" JOIN files f ON i.path = f.path LEFT JOIN {table} t ON f.hash = t.hash"
+                f' WHERE i."set" IN ({", ".join("?" * len(sets))}) AND t.hash IS NULL',
+                sets,
+            ).fetchall()
+
+    def put(self, table: str, hash: str, d: dict):
+        columns = TABLES[table]
+        with self.lock:
+            self.db.execute(
+                f"INSERT OR REPLACE INTO {table} VALUES"
+                f" ({', '.join('?' * (len(columns) + 1))})",
+                (hash, *(d[c] for c in columns)),
+            )
+
+    def flush(self):
+        with self.lock:
+            self.db.commit()
+
+
+catalogs = {}
+
+
+def get_catalog(inst_dir: str) -> Catalog:
+    if inst_dir not in catalogs:
+        catalogs[inst_dir] = Catalog(inst_dir)
+    return catalogs[inst_dir]
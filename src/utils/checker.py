@@ -1,61 +1,129 @@
 #!/usr/bin/env python3
-import pandas as pd
+"""
+Checks of the bounds of a table of results against the historical ones
+(metadata.csv) and Held's root bounds (held-root.csv).
+
+Both are read on the first check, not when the module is imported, and
+indexed by instance. A whole table is then checked at once, with a
+verdict for each row:
+
+    not found       the instance is not in metadata.csv
+    invalid LB      LB above the historical UB
+    invalid UB      UB below the historical LB
+    closed          solved an instance never solved before
+    improved UB     better than the historical bounds
+    improved LB
+    improved LB+UB
+    ""              nothing to say
+
+The first that applies is the verdict.
+"""
+import functools
 import os
 
+import numpy as np
+import pandas as pd
+
 import conf
 
 inst = conf.macos_instances if os.uname().sysname == "Darwin" else conf.linux_instances
 
-hist = {
-    line[1]["instance"]: dict(line[1])
-    for line in pd.read_csv(f"{inst}/metadata.csv").iterrows()
-}
+NOT_FOUND = "not found"
+INVALID_LB = "invalid LB"
+INVALID_UB = "invalid UB"
+CLOSED = "closed"
+IMPROVED_UB = "improved UB"
+IMPROVED_LB = "improved LB"
+IMPROVED_BOTH = "improved LB+UB"
 
-root = {
-    line[1]["instance"]: dict(line[1])
-    for line in pd.read_csv(f"{inst}/held-root.csv").iterrows()
-}
 
+def read(name: str, columns: list[str]) -> pd.DataFrame:
+    try:
+        df = pd.read_csv(f"{inst}/{name}", usecols=["instance", *columns])
+    except (OSError, ValueError):
+        print(f"🚧 Could not read {inst}/{name}, nothing to check against.")
+        df = pd.DataFrame(columns=["instance", *columns])
+    return df.drop_duplicates("instance").set_index("instance")
 
-def check(d: dict) -> list[str]:
-    # get the line from hist with hist["instance"] == inst["instance"]
-    i = d.copy()
-    inst = i["instance"] + " " * (14 - len(i["instance"]))
-    if i["instance"] not in hist.keys():
-        return [f"🚧 {inst}: Instance not found in historical data."]
 
-    h = hist[i["instance"]]
+@functools.cache
+def reference() -> pd.DataFrame:
+    """
+    The historical bounds (hist_lb, hist_ub) and Held's root LB (held_root_lb)
+    of each instance, indexed by instance.
+    """
+    hist = read("metadata.csv", ["lb", "ub"]).add_prefix("hist_")
+    root = read("held-root.csv", ["lb"]).add_prefix("held_root_")
+    ref = hist.join(root, how="left")
+    return ref.apply(pd.to_numeric, errors="coerce")
 
-    i["lb"] = int(i["lb"]) if i["lb"] else None
-    i["ub"] = int(i["ub"]) if i["ub"] else None
-    try:
-        i["root_lb"] = int(i["root_lb"]) if "root_lb" in i and i["root_lb"] else None
-    except ValueError:
-        i["root_lb"] = None
 
-    try:
-        held = int(root[i["instance"]]["lb"])
-    except ValueError:
-        held = None
-    except KeyError:
-        i["root_lb"] = None
+def check(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The table with the reference bounds of each row and its verdict. A
+    table without rows (e.g. of an empty log directory) has nothing to
+    check, and only gets an empty verdict column.
+    """
+    if df.empty or "instance" not in df.columns:
+        return df.assign(verdict="")
+    ref = reference()
+    pos = ref.index.get_indexer(df["instance"])
+    found = pos >= 0
 
-    # print(i)
+    def column(c):
+        # Only the found positions, -1 is no row (and ref may be empty)
+        values = np.full(len(pos), np.nan)
+        values[found] = ref[c].to_numpy(float)[pos[found]]
+        return values
 
-    # if i["root_lb"] and i["root_lb"] != held[]:
-    #     return [f"❌ {inst}: My root LB {i['root_lb']} != Held's LB {held}."]
-    if i["lb"] and h["ub"] < i["lb"]:
-        return [f"❌ {inst}: LB {i['lb']} is higher than historical UB {h['ub']}."]
-    if i["ub"] and h["lb"] > i["ub"]:
-        return [f"❌ {inst}: UB {i['ub']} is lower than historical LB {h['lb']}."]
+    h_lb, h_ub = column("hist_lb"), column("hist_ub")
+    lb = pd.to_numeric(df["lb"], errors="coerce").to_numpy(float)
+    ub = pd.to_numeric(df["ub"], errors="coerce").to_numpy(float)
 
-    if i["lb"] and h["lb"] != h["ub"] and i["lb"] == i["ub"]:
-        return [f"⭐ {inst}: We closed an instance never solved before!"]
+    # A bound of 0 (or none) is no bound
+    has_lb, has_ub = lb > 0, ub > 0
+    better_ub = has_ub & (h_ub > ub)
+    better_lb = has_lb & (h_lb < lb)
+    verdict = np.select(
+        [
+            ~found,
+            has_lb & (h_ub < lb),
+            has_ub & (h_lb > ub),
+            has_lb & (h_lb != h_ub) & (lb == ub),
+            better_ub & better_lb,
+            better_ub,
+            better_lb,
+        ],
+        [NOT_FOUND, INVALID_LB, INVALID_UB, CLOSED, IMPROVED_BOTH, IMPROVED_UB, IMPROVED_LB],
+        default="",
+    )
+    return df.assign(
+        hist_lb=h_lb, hist_ub=h_ub, held_root_lb=column("held_root_lb"), verdict=verdict
+    )
 
-    ret = []
-    if i["ub"] and h["ub"] > i["ub"]:
-        ret.append(f"🎀 {inst}: UB {i['ub']} is better the historical UB {h['ub']}.")
-    if i["lb"] and h["lb"] < i["lb"]:
-        ret.append(f"🎀 {inst}: LB {i['lb']} is better the historical LB {h['lb']}.")
 
+def messages(checked: pd.DataFrame) -> list[str]:
+    """
+    One line for each verdict of a checked table.
+    """
+    ret = []
+    rows = checked[checked["verdict"] != ""]
+    if rows.empty:
+        return ret
+    columns = ("instance", "lb", "ub", "hist_lb", "hist_ub", "verdict")
+    # Every bound in a message is there, as it made the verdict
+    for i, lb, ub, h_lb, h_ub, v in zip(*(rows[c] for c in columns)):
+        name = i + " " * (14 - len(i))
+        if v == NOT_FOUND:
+            ret.append(f"🚧 {name}: Instance not found in historical data.")
+        elif v == INVALID_LB:
+            ret.append(f"❌ {name}: LB {lb:.0f} is higher than historical UB {h_ub:.0f}.")
+        elif v == INVALID_UB:
+            ret.append(f"❌ {name}: UB {ub:.0f} is lower than historical LB {h_lb:.0f}.")
+        elif v == CLOSED:
+            ret.append(f"⭐ {name}: We closed an instance never solved before!")
+        if v in (IMPROVED_UB, IMPROVED_BOTH):
+            ret.append(f"🎀 {name}: UB {ub:.0f} is better the historical UB {h_ub:.0f}.")
+        if v in (IMPROVED_LB, IMPROVED_BOTH):
+            ret.append(f"🎀 {name}: LB {lb:.0f} is better the historical LB {h_lb:.0f}.")
     return ret
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Instance by instance comparison of builds (histogram.py, accu-diff.py,
+matilda2.py).
+
+Each build is compared with a base build on the instances they solved, with
+NaN as "not solved" in the time arrays. The kernels are numpy operations on
+whole columns and define every case:
+
+                        relative_difference     performance_ratio
+    both solved         (ref - t) / min         t / ref
+    only the build      +inf                    0
+    only the base       -inf                    +inf
+    neither             NaN                     NaN
+"""
+import numpy as np
+import pandas as pd
+
+from utils.profile import align
+
+
+def relative_difference(t: np.ndarray, ref: np.ndarray) -> np.ndarray:
+    """
+    How much faster t is than ref, relative to the faster of the two:
+    positive if t is faster, negative if ref is.
+    """
+    solved, ref_solved = ~np.isnan(t), ~np.isnan(ref)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d = (ref - t) / np.minimum(t, ref)
+    d = np.where(solved & ~ref_solved, np.inf, d)
+    return np.where(~solved & ref_solved, -np.inf, d)
+
+
+def performance_ratio(t: np.ndarray, ref: np.ndarray) -> np.ndarray:
+    """
+    t / ref: below 1 if t is faster, above 1 if ref is.
+    """
+    solved, ref_solved = ~np.isnan(t), ~np.isnan(ref)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = t / ref
+    r = np.where(solved & ~ref_solved, 0.0, r)
+    return np.where(~solved & ref_solved, np.inf, r)
+
+
+def compare(results: dict[str, pd.DataFrame], kernel=relative_difference, base=None):
+    """
+    One column per build ({name: table}) other than the base (by default the
+    first), with the kernel of its times against the base's, for every
+    instance in any of the tables.
+
+    Instances with a time of 0 in any build are left out, as no ratio of
+    them means anything.
+    """
+    a = align(results)
+    t = np.where(a.solved(), a.time, np.nan)
+    keep = ~(t == 0).any(axis=1)
+    t = t[keep]
+
+    b = a.builds.index(base) if base is not None else 0
+    df = pd.DataFrame({"instance": a.instances[keep]})
+    for j, name in enumerate(a.builds):
+        if j != b:
+            df[name] = kernel(t[:, j], t[:, b])
+    return df
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Reader of DIMACS graph files (.col) and the statistics of each graph.
+
+A DIMACS file is a "p edge n m" line and one "e u v" line per edge, with
+1-based vertices, possibly with "c" comment lines. The edges are parsed in
+bulk by numpy, so a graph with millions of edges takes seconds.
+
+The statistics are kept in the instance catalog (utils.catalog), by content
+hash, so each graph is only read once.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+import utils.catalog as catalog
+from utils.utils import pmap
+
+# The statistics of `stats`. Only the header's n and m are kept in the catalog.
+STATS = ("n", "m", *catalog.STATS)
+
+
+def read(path: str) -> tuple[int, np.ndarray]:
+    """
+    The number of vertices and the (m, 2) array of edges, 0-based, as in
+    the file (duplicates and loops included).
+    """
+    with open(path, "rb") as fd:
+        data = fd.read()
+
+    # The header is every line before the first edge, however many
+    n, start = 0, 0
+    while start < len(data) and not data.startswith(b"e", start):
+        end = data.find(b"\n", start)
+        end = len(data) if end < 0 else end
+        if data.startswith(b"p", start):
+            n = int(data[start:end].split()[2])
+        start = end + 1
+    body = data[start:]
+
+    # Comments among the edges are rare, only then go line by line
+    if b"\nc" in body or b"\np" in body:
+        body = b"\n".join(l for l in body.split(b"\n") if l.startswith(b"e"))
+    edges = np.fromstring(body.replace(b"e", b" "), dtype=np.int64, sep=" ")
+    if len(edges) % 2:
+        raise ValueError(f"{path}: malformed edge lines")
+    edges = edges.reshape(-1, 2) - 1
+
+    n = max(n, int(edges.max()) + 1 if len(edges) else 0)
+    return n, edges
+
+
+def simple(n: int, edges: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The endpoints u < v of each edge, without loops and duplicates.
+    """
+    edges = np.sort(edges, axis=1)
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    keys = np.unique(edges[:, 0] * n + edges[:, 1])
+    return keys // n, keys % n
+
+
+def complement_components(n: int, u: np.ndarray, v: np.ndarray) -> int:
+    """
+    Connected components of the complement, without building it: a search
+    where the neighbours of x are the unvisited vertices not adjacent to x,
+    in O(n + m).
+    """
+    heads, tails = np.concatenate([u, v]), np.concatenate([v, u])
+    order = np.argsort(heads, kind="stable")
+    heads, tails = heads[order], tails[order]
+    start = np.searchsorted(heads, np.arange(n + 1))
+
+    unvisited = set(range(n))
+    count = 0
+    while unvisited:
+        stack = [unvisited.pop()]
+        count += 1
+        while stack and unvisited:
+            x = stack.pop()
+            adj = set(tails[start[x] : start[x + 1]].tolist())
+            reach = [y for y in unvisited if y not in adj]
+            unvisited.difference_update(reach)
+            stack.extend(reach)
+    return count
+
+
+def stats(n: int, edges: np.ndarray) -> dict:
+    """
+    Size, density, degrees and components of the simple graph.
+    """
+    u, v = simple(n, edges)
+    m = len(u)
+
+    degree = np.bincount(np.concatenate([u, v]), minlength=n)
+    graph = coo_matrix((np.ones(m, dtype=np.int8), (u, v)), shape=(n, n))
+    components, _ = connected_components(graph, directed=False)
+
+    return {
+        "n": n,
+        "m": m,
+        "density": 2 * m / (n * (n - 1)) if n > 1 else 0.0,
+        "min_degree": int(degree.min()) if n else 0,
+        "max_degree": int(degree.max()) if n else 0,
+        "mean_degree": float(degree.mean()) if n else 0.0,
+        "std_degree": float(degree.std()) if n else 0.0,
+        "components": int(components),
+        "components_complement": complement_components(n, u, v),
+    }
+
+
+def file_stats(path: str) -> dict:
+    return stats(*read(path))
+
+
+def index(inst_dir: str, sets: str = "all", only=None, processes=True) -> pd.DataFrame:
+    """
+    The statistics of every instance in the sets (or only of the names in
+    `only`), computing in parallel those not in the catalog yet.
+    """
+    cat = catalog.get_catalog(inst_dir)
+    missing = cat.missing(sets, "stats")
+    if only is not None:
+        only = set(only)
+        missing = [(p, h) for p, h in missing if os.path.basename(p) in only]
+
+    paths = [p for p, _ in missing]
+    for (_, h), d in zip(missing, pmap(file_stats, paths, processes=processes)):
+        cat.put("stats", h, d)
+    cat.flush()
+
+    columns = ("name", *STATS)
+    df = pd.DataFrame(cat.query(sets, columns=columns), columns=columns)
+    df = df.rename(columns={"name": "instance"})
+    return df if only is None else df[df["instance"].isin(only)]
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Execution engine for the solver runs.
+
+The solvers run as subprocesses of an asyncio loop, at most `workers` at a
+time, and their time limits are event-loop timers. Once a solver exits its
+slot is given to the next job right away, and its log goes to a separate
+process pool to be parsed.
+
+Each run is reaped with `os.wait4`, and its resource usage (wall time,
+user/sys CPU, max RSS, exit status, whether we killed it) is appended to
+the end of its log as a single "harness: key=value ..." line, which
+`parse_functions.get_usage` reads back.
+
+asyncio and the process pool are imported by the functions using them, so
+that importing the module for `Job` (runner.py --help) stays fast.
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, NamedTuple
+
+import utils.topology as topology
+
+
+class Job(NamedTuple):
+    key: tuple  # what the job is, e.g. (build, instance)
+    cmd: list[str]
+    log_file: str
+    tl: float
+    run: bool = True  # False to only parse an existing log
+
+
+def usage(status: int, ru, wall: float, killed: bool, tl: float) -> dict:
+    # ru_maxrss is in KB on Linux but in bytes on macOS
+    rss = ru.ru_maxrss / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+    return {
+        "wall": round(wall, 3),
+        "user": round(ru.ru_utime, 3),
+        "sys": round(ru.ru_stime, 3),
+        "maxrss": round(rss, 1),
+        "exit": os.WEXITSTATUS(status) if os.WIFEXITED(status) else "",
+        "signal": os.WTERMSIG(status) if os.WIFSIGNALED(status) else "",
+        "killed": int(killed),
+        "tl": tl,
+    }
+
+
+def write_usage(log_file: str, u: dict):
+    with open(log_file, "a") as fd:
+        fd.write("\nharness: " + " ".join(f"{k}={v}" for k, v in u.items()) + "\n")
+
+
+async def wait4(pid: int):
+    """
+    Wait for the child without blocking the loop, keeping its rusage.
+    Uses a pidfd where there is one (Linux), a thread otherwise.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    try:
+        fd = os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        return await loop.run_in_executor(None, os.wait4, pid, 0)
+
+    exited = loop.create_future()
+    loop.add_reader(fd, lambda: exited.done() or exited.set_result(None))
+    try:
+        await exited
+    finally:
+        loop.remove_reader(fd)
+        os.close(fd)
+    return os.wait4(pid, 0)
+
+
+async def execute(job: Job, cpus: set[int] | None = None) -> dict:
+    """
+    Run the job's command with its output on the log, pinned to `cpus`, and
+    kill it at the time limit. Returns its resource usage.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    killed = False
+
+    def kill():
+        nonlocal killed
+        killed = True
+        proc.kill()
+
+    with open(job.log_file, "w") as fd:
+        start = time.monotonic()
+        proc = subprocess.Popen(topology.pinned(job.cmd, cpus), stdout=fd, stderr=fd)
+    timer = loop.call_later(job.tl, kill)
+    try:
+        _, status, ru = await wait4(proc.pid)
+    finally:
+        timer.cancel()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+
+    u = usage(status, ru, time.monotonic() - start, killed, job.tl)
+    write_usage(job.log_file, u)
+    return u
+
+
+def execute_sync(cmd: list[str], log_file: str, tl: float, cpus=None) -> dict:
+    """
+    Same as `execute`, blocking the calling thread.
+    """
+    killed = threading.Event()
+
+    def kill():
+        killed.set()
+        proc.kill()
+
+    with open(log_file, "w") as fd:
+        start = time.monotonic()
+        proc = subprocess.Popen(topology.pinned(cmd, cpus), stdout=fd, stderr=fd)
+    timer = threading.Timer(tl, kill)
+    timer.start()
+    try:
+        _, status, ru = os.wait4(proc.pid, 0)
+    finally:
+        timer.cancel()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+
+    u = usage(status, ru, time.monotonic() - start, killed.is_set(), tl)
+    write_usage(log_file, u)
+    return u
+
+
+async def run_async(jobs, workers, parse, cache, parse_workers, cores):
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor
+
+    from tqdm import tqdm
+
+    # Each running job holds one slot, with the CPUs to pin it to (if any)
+    slots = asyncio.Queue()
+    for cpus in cores or [None] * workers:
+        slots.put_nowait(cpus)
+
+    # The parsing happens on the CPUs left free by the solvers, not on the
+    # siblings of their cores, which would add noise to their times
+    spare = set()
+    if cores and hasattr(os, "sched_getaffinity"):
+        spare = os.sched_getaffinity(0) - topology.siblings_of(set().union(*cores))
+
+    loop = asyncio.get_running_loop()
+    results = {}
+
+    with ProcessPoolExecutor(
+        max_workers=parse_workers, initializer=topology.pin, initargs=(0, spare)
+    ) as pool:
+
+        async def one(job: Job):
+            if job.run:
+                cpus = await slots.get()
+                try:
+                    await execute(job, cpus)
+                except OSError as e:
+                    print(f"❌ {job.key}: {e}")
+                    return job, None
+                finally:
+                    slots.put_nowait(cpus)
+
+            d = cache.get(job.log_file) if cache else None
+            if d is None:
+                try:
+                    d = await loop.run_in_executor(pool, parse, job.log_file)
+                except Exception as e:
+                    print(f"Error while parsing {job.key}: {e}")
+                    return job, None
+                if cache:
+                    cache.put(job.log_file, d)
+            return job, d
+
+        # Tasks start in the order they are created, which is the order the
+        # slots go to (as_completed alone would start them in hash order)
+        tasks = [asyncio.create_task(one(j)) for j in jobs]
+        for task in tqdm(asyncio.as_completed(tasks), total=len(tasks), smoothing=0.0):
+            job, d = await task
+            results[job.key] = d
+
+    if cache:
+        cache.flush()
+    return results
+
+
+def run(
+    jobs: list[Job],
+    workers: int,
+    parse: Callable[[str], dict],
+    cache=None,
+    parse_workers=None,
+    cores=None,
+) -> dict:
+    """
+    Run every job and parse its log. Returns {job.key: record}, with None for
+    jobs that could not run.
+
+    With `cores` (see utils.topology.placement), there is one worker per
+    entry and each solver is pinned to the CPUs of the slot it runs on.
+    """
+    import asyncio
+
+    workers = len(cores) if cores else workers
+    parse_workers = parse_workers or max(1, (os.cpu_count() or 1) - workers)
+    return asyncio.run(
+        run_async(jobs, workers, parse, cache, parse_workers, cores)
+    )
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Spectral features of the graphs, for the MATILDA instance space (matilda.py).
+
+    density                 2m / (n (n - 1))
+    algebraic_connectivity  second smallest eigenvalue of the Laplacian
+    energy                  sum of the absolute eigenvalues of the adjacency
+
+Up to DENSE vertices, every eigenvalue is computed with a dense solver.
+Larger graphs use sparse ones: shift-invert Lanczos (eigsh) for the
+algebraic connectivity, and stochastic Lanczos quadrature for the energy,
+which is then an estimate (within about a percent).
+
+Like the statistics of utils.dimacs, the features are kept in the instance
+catalog by content hash, so only new or changed graphs are computed.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.linalg import eigh_tridiagonal
+from scipy.sparse import coo_matrix, diags
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import eigsh
+
+import utils.catalog as catalog
+import utils.dimacs as dimacs
+from utils.utils import pmap
+
+DENSE = 3000
+FEATURES = ("density", "algebraic_connectivity", "energy")
+
+
+def adjacency(n: int, u: np.ndarray, v: np.ndarray):
+    A = coo_matrix((np.ones(len(u)), (u, v)), shape=(n, n))
+    return (A + A.T).tocsr()
+
+
+def algebraic_connectivity(A) -> float:
+    n = A.shape[0]
+    if n < 2 or connected_components(A, directed=False)[0] > 1:
+        return 0.0
+    L = diags(np.asarray(A.sum(axis=1)).ravel()) - A
+    if n <= DENSE:
+        return float(np.linalg.eigvalsh(L.toarray())[1])
+    # The two eigenvalues closest to (just below) 0 are 0 and the one we want
+    vals = eigsh(L.tocsc(), k=2, sigma=-1e-3, which="LM", return_eigenvectors=False)
+    return float(np.sort(vals)[1])
+
+
+def lanczos(A, v: np.ndarray, steps: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The tridiagonal (diagonal, off-diagonal) of `steps` Lanczos iterations on
+    A from v, with full reorthogonalization.
+    """
+    Q = np.zeros((steps, len(v)))
+    alpha, beta = np.zeros(steps), np.zeros(steps)
+    q = v / np.linalg.norm(v)
+    for j in range(steps):
+        Q[j] = q
+        w = A @ q
+        alpha[j] = q @ w
+        w -= Q[: j + 1].T @ (Q[: j + 1] @ w)
+        beta[j] = np.linalg.norm(w)
+        if beta[j] < 1e-10:
+            return alpha[: j + 1], beta[:j]
+        q = w / beta[j]
+    return alpha, beta[:-1]
+
+
+def energy(A, steps: int = 80, probes: int = 40, seed: int = 0) -> float:
+    n = A.shape[0]
+    if n <= DENSE:
+        return float(np.abs(np.linalg.eigvalsh(A.toarray())).sum())
+
+    # tr |A| ~ n * mean of v^T |A| v over random unit vectors v, each given by
+    # the Gauss quadrature of the Lanczos tridiagonal
+    rng = np.random.default_rng(seed)
+    total = 0.0
+    for _ in range(probes):
+        v = rng.choice([-1.0, 1.0], n)
+        alpha, beta = lanczos(A, v, min(steps, n))
+        theta, U = eigh_tridiagonal(alpha, beta)
+        total += np.sum(U[0] ** 2 * np.abs(theta))
+    return float(n * total / probes)
+
+
+def file_features(path: str) -> dict:
+    n, edges = dimacs.read(path)
+    u, v = dimacs.simple(n, edges)
+    A = adjacency(n, u, v)
+    return {"algebraic_connectivity": algebraic_connectivity(A), "energy": energy(A)}
+
+
+def index(inst_dir: str, sets: str = "all", only=None, processes=True) -> pd.DataFrame:
+    """
+    The features of the instances in the sets (or only of the names in
+    `only`), computing in parallel those not in the catalog yet.
+    """
+    dimacs.index(inst_dir, sets, only, processes)
+    cat = catalog.get_catalog(inst_dir)
+    missing = cat.missing(sets, "features")
+    if only is not None:
+        only = set(only)
+        missing = [(p, h) for p, h in missing if os.path.basename(p) in only]
+
+    paths = [p for p, _ in missing]
+    for (_, h), d in zip(missing, pmap(file_features, paths, processes=processes)):
+        cat.put("features", h, d)
+    cat.flush()
+
+    columns = ("name", *FEATURES)
+    df = pd.DataFrame(cat.query(sets, columns=columns), columns=columns)
+    df = df.rename(columns={"name": "instance"})
+    return df if only is None else df[df["instance"].isin(only)]
+
+
+def load(inst_dir: str, sets: str = "all") -> pd.DataFrame:
+    """
+    The features of every instance, from metadata.csv where it has them and
+    computed from the graph otherwise.
+    """
+    try:
+        meta = pd.read_csv(f"{inst_dir}/metadata.csv")
+        meta = meta[["instance", *FEATURES]]
+    except (OSError, KeyError):
+        meta = pd.DataFrame(columns=["instance", *FEATURES])
+
+    known = set(meta.dropna()["instance"])
+    names = catalog.get_catalog(inst_dir).query(sets)
+    todo = [i for i in names if i not in known]
+    if not todo:
+        return meta
+
+    computed = index(inst_dir, sets, only=todo).set_index("instance")
+    meta = meta.set_index("instance")
+    return meta.combine_first(computed).reset_index()
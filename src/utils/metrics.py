@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Anytime performance metrics over bound trajectories (see utils.trajectory).
+
+For each (build, instance), with T the time horizon:
+- primal integral: integral over [0, T] of the primal gap, the relative
+  distance between the incumbent UB and the best UB known for the instance
+  (1 while there is no UB);
+- dual integral: the same with the LB and the best LB known;
+- primal-dual integral: the same with the gap (ub - lb) / ub;
+- time to target: first time the primal-dual gap is at most the target.
+
+Everything is computed on the concatenated events of every build at once.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.trajectory import Trajectories
+
+
+def relative_gap(a, b):
+    """
+    |a - b| / max(|a|, |b|), which is 0 if a == b and 1 if any is missing.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gap = np.abs(a - b) / np.fmax(np.abs(a), np.abs(b))
+    gap = np.where(a == b, 0.0, gap)
+    return np.where(np.isnan(gap), 1.0, gap)
+
+
+def concat(trajectories: dict[str, Trajectories]):
+    """
+    Stack the trajectories of every build. Returns the (build, instance) of
+    each row, the row of each event and the event arrays.
+    """
+    builds = np.concatenate([np.full(len(t), b) for b, t in trajectories.items()])
+    names = np.concatenate([t.instance for t in trajectories.values()])
+    sizes = np.concatenate([np.diff(t.offsets) for t in trajectories.values()])
+    row = np.repeat(np.arange(len(names)), sizes)
+    time, lb, ub = (
+        np.concatenate([getattr(t, c) for t in trajectories.values()])
+        for c in ("time", "lb", "ub")
+    )
+    return builds, names, row, time, lb, ub
+
+
+def integral(gap, start, end, row, first, n_rows):
+    """
+    Sum of gap * (end - start) over the events of each row, with a gap of 1
+    from time 0 to the first event of the row.
+    """
+    total = np.bincount(row, weights=gap * (end - start), minlength=n_rows)
+    return total + first
+
+
+def compute(
+    trajectories: dict[str, Trajectories], horizon: float, target: float = 0.0
+) -> pd.DataFrame:
+    builds, names, row, time, lb, ub = concat(trajectories)
+    n_rows = len(names)
+
+    # Best bounds known for each instance: the final ones, over every build
+    inst, inverse = np.unique(names, return_inverse=True)
+    best_lb = np.full(len(inst), np.nan)
+    best_ub = np.full(len(inst), np.nan)
+    final = np.flatnonzero(np.r_[row[1:] != row[:-1], True]) if len(row) else row
+    np.fmax.at(best_lb, inverse[row[final]], lb[final])
+    np.fmin.at(best_ub, inverse[row[final]], ub[final])
+
+    # Events without a timestamp can not be placed, their bounds are still
+    # carried by the next timed event
+    timed = ~np.isnan(time)
+    row, time, lb, ub = row[timed], time[timed], lb[timed], ub[timed]
+    ref_lb, ref_ub = best_lb[inverse[row]], best_ub[inverse[row]]
+    start = np.minimum(time, horizon)
+
+    # Each event lasts until the next event of the same row, or the horizon
+    last = np.ones(len(row), dtype=bool)
+    last[:-1] = row[1:] != row[:-1]
+    end = np.empty_like(start)
+    end[:-1] = start[1:]
+    end[last] = horizon
+
+    first = np.full(n_rows, float(horizon))
+    np.minimum.at(first, row, start)
+
+    primal = relative_gap(ub, ref_ub)
+    dual = relative_gap(lb, ref_lb)
+    pd_gap = relative_gap(ub, lb)
+
+    ttt = np.full(n_rows, np.inf)
+    hit = (pd_gap <= target) & (time <= horizon)
+    np.minimum.at(ttt, row, np.where(hit, time, np.inf))
+
+    return pd.DataFrame(
+        {
+            "build": builds,
+            "instance": names,
+            "primal_integral": integral(primal, start, end, row, first, n_rows),
+            "dual_integral": integral(dual, start, end, row, first, n_rows),
+            "pd_integral": integral(pd_gap, start, end, row, first, n_rows),
+            "time_to_target": ttt,
+        }
+    )
@@ -2,10 +2,37 @@
 """
 All functions should call the grep function to get the lines of interest
 and return a pair (key, value) to be added to the dictionary.
+
+The log given to those functions can be a path, a list of lines or a
+`LogIndex` built by `scan`. The last one maps the log in memory and answers
+every pattern in `PATTERNS` from it, so any new pattern used by a `get_*`
+function should also be added there.
 """
+import mmap
 import re
 import subprocess
 
+# Where to look for a pattern: every matching line, or only the first or
+# the last one. FIRST and LAST never read past the line they find, so use
+# them for anything printed once, LAST for what is printed at exit.
+ALL, FIRST, LAST = "all", "first", "last"
+
+# Every pattern the get_* functions grep for.
+PATTERNS = {
+    "{ solve_connected": ALL,
+    "ERR": ALL,
+    "FATL": ALL,
+    "Loguru caught a signal": ALL,
+    "atexit": LAST,
+    "Coloring: SOL": LAST,
+    "Root ": FIRST,
+    "New lower bound: ": ALL,
+    "| .   .   Upper": ALL,
+    "| .   Upper": ALL,
+    "Final: ": FIRST,
+    "harness: ": LAST,
+}
+
 
 def gnugrep(pattern: str, file: str, max_matches: int = -1) -> list[str]:
     command = f"grep -m {max_matches} '{pattern}' {file}"
@@ -27,7 +54,125 @@ def pygrep(pattern: str, file: list[str], max_matches: int = -1) -> list[str]:
     return matches
 
 
-def grep(pattern: str, file: str | list[str], max_matches: int = -1) -> list[str]:
+def bre(pattern: str) -> str:
+    """
+    Translate the patterns we use from grep's basic regex to python's.
+    Only `.` is special there, `|`, `{` and friends are literals.
+    """
+    return re.escape(pattern).replace(r"\.", ".")
+
+
+class LogIndex:
+    """
+    The lines of a log matching each of the given patterns, in file order.
+    """
+
+    def __init__(self, path: str, patterns=PATTERNS):
+        self.path = path
+        self.matches = {p: [] for p in patterns}
+
+    def grep(self, pattern: str, max_matches: int = -1) -> list[str]:
+        if pattern not in self.matches:
+            # Not indexed, fallback to the slow path
+            return gnugrep(pattern, self.path, max_matches)
+        lines = [line for _, line in self.matches[pattern]]
+        return lines[:max_matches] if max_matches > 0 else lines
+
+    def events(self, *patterns: str) -> list[tuple[str, str]]:
+        """
+        All lines matching any of the patterns as (pattern, line), in the
+        order they appear on the log.
+        """
+        ev = [(pos, p, line) for p in patterns for pos, line in self.matches[p]]
+        return [(p, line) for _, p, line in sorted(ev, key=lambda e: e[0])]
+
+
+def line_at(mm, pos: int) -> tuple[int, str]:
+    """
+    The line of `mm` containing the byte at `pos`, and where it starts.
+    """
+    start = mm.rfind(b"\n", 0, pos) + 1
+    end = mm.find(b"\n", pos)
+    line = mm[start : end if end >= 0 else len(mm)]
+    return start, line.decode(errors="replace").strip()
+
+
+def find_first(mm, pattern: str) -> int:
+    if "." not in pattern:
+        return mm.find(pattern.encode())
+    m = re.compile(bre(pattern).encode()).search(mm)
+    return m.start() if m else -1
+
+
+def find_last(mm, pattern: str, window: int = 1 << 20) -> int:
+    """
+    Search backwards from the end, reading a growing window at a time.
+    """
+    if "." not in pattern:
+        return mm.rfind(pattern.encode())
+
+    regex = re.compile(bre(pattern).encode())
+    end = len(mm)
+    while end > 0:
+        start = mm.rfind(b"\n", 0, max(0, end - window)) + 1
+        found = [m.start() for m in regex.finditer(mm, start, end)]
+        if found:
+            return found[-1]
+        end, window = start, 2 * window
+    return -1
+
+
+def scan(log_file: str, patterns=PATTERNS) -> LogIndex:
+    """
+    Collect the lines matching each pattern, mapping the log in memory.
+    `patterns` maps each pattern to ALL, FIRST or LAST; a plain sequence of
+    patterns means ALL for each.
+
+    FIRST patterns are searched from the top and LAST ones from the end of
+    the log. Every ALL pattern is matched in a single pass over the file.
+    """
+    if not isinstance(patterns, dict):
+        patterns = dict.fromkeys(patterns, ALL)
+    index = LogIndex(log_file, patterns)
+
+    try:
+        with open(log_file, "rb") as fd:
+            mm = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return index  # missing or empty log
+
+    with mm:
+        for p, where in patterns.items():
+            if where == ALL:
+                continue
+            pos = find_first(mm, p) if where == FIRST else find_last(mm, p)
+            if pos >= 0:
+                index.matches[p].append(line_at(mm, pos))
+
+        every = [p for p, where in patterns.items() if where == ALL]
+        if not every:
+            return index
+
+        regex = {p: re.compile(bre(p)) for p in every}
+        anything = re.compile("|".join(bre(p) for p in every).encode())
+
+        last = -1
+        for m in anything.finditer(mm):
+            start, line = line_at(mm, m.start())
+            if start == last:
+                continue  # already matched this line
+            last = start
+            for p, r in regex.items():
+                if r.search(line):
+                    index.matches[p].append((start, line))
+    return index
+
+
+def grep(
+    pattern: str, file: str | list[str] | LogIndex, max_matches: int = -1
+) -> list[str]:
+    if isinstance(file, LogIndex):
+        return file.grep(pattern, max_matches)
     if isinstance(file, str):
         return gnugrep(pattern, file, max_matches)
     return pygrep(pattern, file, max_matches)
@@ -131,3 +276,25 @@ def get_root_sets(log_file) -> dict:
     n_pricings = int(root[0].split("|")[-1].split(" pricings")[0])
 
     return {"sets_root": n_sets, "pricings_root": n_pricings}
+
+
+def get_usage(log_file) -> dict:
+    """
+    Resource usage of the run, appended to the log by utils.engine.
+    """
+    usage = grep("harness: ", log_file, max_matches=1)
+    if not usage:
+        return {}
+
+    u = dict(kv.split("=") for kv in usage[0].split("harness: ")[1].split())
+    number = lambda v: float(v) if v else None
+    return {
+        "wall_time": number(u["wall"]),
+        "user_time": number(u["user"]),
+        "sys_time": number(u["sys"]),
+        "max_rss": number(u["maxrss"]),
+        "exit_code": number(u["exit"]),
+        "exit_signal": number(u["signal"]),
+        "killed": number(u["killed"]),
+        "tl": number(u["tl"]),
+    }
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+The figures of the dissertation, as functions from the results to a
+matplotlib figure. The scripts (pp.py, matilda.py, ...) and figures.py only
+load the data, call these and save the figure.
+
+`results` is always {name: table}, with the name of each CSV without the
+extension, in the order given.
+"""
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+import scienceplots  # registers the "science" style
+import seaborn as sns
+
+from utils.compare import compare, relative_difference, performance_ratio
+from utils.profile import align, solved_times, gaps, ratios, ecdf
+
+STYLE = "~/mest/script/src/dis.mplstyle"
+
+
+def style():
+    plt.style.use("science")
+    plt.style.use(STYLE)
+
+
+def label_of(name: str) -> str:
+    return "Held et al." if "held" in name else "Ours"
+
+
+def plot_cumulative(data, axis, n_instances, label=None):
+    x, y = ecdf(data, n_instances)
+    axis.plot(x, y, label=label, drawstyle="steps-post")
+
+
+def summary(results: dict[str, pd.DataFrame]):
+    for name, df in results.items():
+        tl = pd.to_numeric(df["time"], errors="coerce").max()
+        print(f"{name:^25}... TL ~{tl:4.0f} | {len(df)} instances")
+
+
+def gap_axis(ax, xlim):
+    ax.set_ylim(0.0, 1.0)
+    ax.grid(axis="y", linestyle="--", alpha=0.7)
+    ax.tick_params(axis="y", which="both", left=False, right=True, labelsize=False)
+    ax.spines["left"].set_visible(False)
+
+    ax.set_xscale("log")
+    ax.set_xlabel("Gap")
+    ax.set_xlim(*xlim)
+    ax.grid(axis="x", linestyle="--", alpha=0.7)
+
+
+def plot_gaps(ax, aligned, n_inst, xlim):
+    for name, gap in zip(aligned.builds, gaps(aligned).T):
+        if len(gap[(0 < gap) & (gap < xlim[0])]) > 0:
+            print(f"File {name} has {len(gap[gap < 0.0036])} instances with gap < {xlim[0]}.")
+        if len(gap[gap > xlim[1]]) > 0:
+            print(f"File {name} has {len(gap[gap > 10.0])} instances with gap > {xlim[1]}.")
+            print(np.nanmax(gap))
+        plot_cumulative(gap, axis=ax, label=label_of(name), n_instances=n_inst)
+
+
+def accu(results: dict[str, pd.DataFrame], instances) -> plt.Figure:
+    """
+    Solved time and gap ECDFs of each build on the instances (pp.py).
+    """
+    results = {k: r[r["instance"].isin(instances)] for k, r in results.items()}
+    summary(results)
+    n_inst = len(instances)
+
+    fig, axs = plt.subplots(1, 2, gridspec_kw={"width_ratios": [7, 4]})
+    # Set size as width 16cm and height 9cm
+    fig.set_size_inches(6.3, 3.54)
+
+    # === Plotting time x cumulative probability ===============================
+    axs[0].set_ylim(0.0, 1.0)
+    axs[0].grid(axis="y", linestyle="--", alpha=0.7)
+    axs[0].spines["right"].set_visible(False)
+
+    axs[0].set_xscale("log")
+    axs[0].set_xlabel("Time (s)")
+    axs[0].set_xlim(0.001, 3600)
+    axs[0].grid(axis="x", linestyle="--", alpha=0.7)
+
+    # All the results, as arrays of (instances, builds)
+    aligned = align(results, instances)
+    for name, time in zip(aligned.builds, solved_times(aligned).T):
+        print(f"{name:^25}... {len(time[time < 3600])} solved in {time.sum():.2f}s.")
+        plot_cumulative(time, axis=axs[0], label=name, n_instances=n_inst)
+
+    # === Plotting gap x cumulative probability ================================
+    gap_axis(axs[1], (0.004, 200))
+    plot_gaps(axs[1], aligned, n_inst, (0.004, 200))
+
+    axs[1].legend(loc="lower right")
+    fig.subplots_adjust(wspace=0)
+    return fig
+
+
+def perf(results: dict[str, pd.DataFrame], instances) -> plt.Figure:
+    """
+    Performance profile and gap ECDF on the instances with ub > 3 that every
+    build has (pp2.py).
+    """
+    results = {
+        k: r[r["instance"].isin(instances) & (r["ub"] > 3)] for k, r in results.items()
+    }
+    summary(results)
+
+    aligned = align(results).common()
+    n_inst = len(aligned.instances)
+    print("Common instances:", n_inst)
+
+    fig, axs = plt.subplots(1, 2, figsize=(16, 9), gridspec_kw={"width_ratios": [7, 4]})
+
+    # === Plotting ratio x cumulative probability ==============================
+    axs[0].set_ylim(0.0, 1.0)
+    axs[0].grid(axis="y", linestyle="--", alpha=0.7)
+    axs[0].spines["right"].set_visible(False)
+
+    axs[0].set_xscale("log")
+    axs[0].set_xlabel("Performance ratio")
+    axs[0].set_xlim(1, 200)
+    axs[0].grid(axis="x", linestyle="--", alpha=0.7)
+
+    # Time over the best time on each instance
+    for name, ratio in zip(aligned.builds, ratios(aligned).T):
+        plot_cumulative(ratio, axis=axs[0], label=label_of(name), n_instances=n_inst)
+
+    # === Plotting gap x cumulative probability ================================
+    gap_axis(axs[1], (0.004, 10.3))
+    plot_gaps(axs[1], aligned, n_inst, (0.004, 10.3))
+
+    axs[1].legend(loc="lower right")
+    fig.subplots_adjust(wspace=0)
+    return fig
+
+
+def histogram(results: dict[str, pd.DataFrame]) -> plt.Figure:
+    """
+    Histogram of the relative difference of the times of each build to the
+    first one, on the matilda instances (histogram.py).
+    """
+    results = {k: r[r["instance"].str.startswith("g")] for k, r in results.items()}
+
+    # diff := (time_1 - time_n) / min(time_1, time_n), > 0 if n is faster,
+    # +inf if only n solved the instance and -inf if only the first one did
+    df = compare(results, relative_difference)
+    df = df.melt(id_vars="instance", var_name="build", value_name="diff").dropna()
+
+    # Those only one of them solved (+-inf) end up at the edges
+    finite = df["diff"][np.isfinite(df["diff"])]
+    range = max(abs(finite.quantile(0.05)), abs(finite.quantile(0.95)))
+    df["diff"] = df["diff"].clip(-range, range)
+    df = df.sort_values("diff", key=abs)  # sort by absolute value of diff
+
+    fig, ax = plt.subplots()
+    several = df["build"].nunique() > 1
+    with sns.color_palette("tab10"):
+        sns.histplot(
+            data=df, x="diff", hue="build" if several else None, bins=40, kde=True, ax=ax
+        )
+
+    for build, diff in df.groupby("build")["diff"]:
+        prefix = f"{build}: " if several else ""
+        # add a mark on the mean and median values
+        ax.axvline(
+            diff.mean(),
+            color="k",
+            linestyle="--",
+            label=prefix + "Mean = {:.2f}".format(diff.mean()),
+        )
+        ax.axvline(
+            diff.median(),
+            color="r",
+            linestyle="-.",
+            label=prefix + "Median = {:.2f}".format(diff.median()),
+        )
+    ax.legend()
+    return fig
+
+
+def accu_perf(results: dict[str, pd.DataFrame]) -> plt.Figure:
+    """
+    ECDF of the performance ratio of each build to the first one, on DIMACS
+    and MATILDA instances (accu-diff.py).
+    """
+    # diff := time_n / time_1, 0 if only n solved the instance and +inf if
+    # only the first one did. Instances neither solved are left out.
+    df = compare(results, performance_ratio)
+    df = df.melt(id_vars="instance", var_name="build", value_name="diff").dropna()
+
+    finite = df["diff"][np.isfinite(df["diff"]) & (df["diff"] > 0)]
+    range = max(1 / finite.quantile(0.05), finite.quantile(0.95))
+    df = df.sort_values("diff")
+
+    matilda = df[df["instance"].str.startswith("g")]
+    dimacs = df[~df["instance"].str.startswith("g")]
+
+    # Those only the build solved (0) start the curve above 0, those only the
+    # first one solved (inf) keep it from reaching 1.
+    fig, ax = plt.subplots()
+    several = df["build"].nunique() > 1
+    for label, subset in (("DIMACS", dimacs), ("MATILDA", matilda)):
+        for build, diff in subset.groupby("build")["diff"]:
+            x, y = ecdf(diff.to_numpy())
+            ax.plot(
+                x, y, drawstyle="steps-post", label=f"{build} {label}" if several else label
+            )
+    ax.set_xscale("log")
+    ax.legend(loc="lower right")
+
+    ax.set_xlim(1 / range, range)
+    ax.set_xlabel("Performance Ratio")
+    ax.set_ylabel("")
+    ax.grid(True, which="major", ls="--", alpha=0.7)
+    return fig
+
+
+def project(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The v1/v2 coordinates of the MATILDA instance space.
+    """
+    df["v1"] = (
+        0.559 * df["density"] + 0.614 * df["algebraic_connectivity"] + 0.557 * df["energy"]
+    )
+    df["v2"] = (
+        -0.702 * df["density"] - 0.007 * df["algebraic_connectivity"] + 0.712 * df["energy"]
+    )
+    return df
+
+
+def matilda_dist(results: dict[str, pd.DataFrame], metadata: pd.DataFrame) -> plt.Figure:
+    """
+    The matilda instances on the instance space, coloured by the build that
+    solved them fastest (matilda.py).
+    """
+    dataframes = []
+    for name, df in results.items():
+        df = df.assign(source=name)
+        # unsolved (lb != ub and lb > 0) have no time
+        df.loc[(df["lb"] != df["ub"]) & (df["lb"] > 0), "time"] = None
+        dataframes.append(df)
+    all_data = pd.concat(dataframes, ignore_index=True)[["instance", "time", "source"]]
+
+    # The CSV with the lowest time of each instance
+    best_times = all_data.sort_values(by="time").groupby("instance").first().reset_index()
+    best_times = best_times[best_times["instance"].str.startswith("g")]
+    m = project(pd.merge(best_times, metadata, on="instance"))
+    print(m)
+
+    unique_files = m["source"].unique()
+    colors = plt.get_cmap("tab10", len(unique_files))
+    color_map = {file: colors(i) for i, file in enumerate(unique_files)}
+
+    fig, axs = plt.subplots(2, 2, figsize=(10, 8))
+
+    def plot_scatter(ax, x, y, xlabel, ylabel, title, log=True):
+        for file, color in color_map.items():
+            subset = m[m["source"] == file]
+            ax.scatter(subset[x], subset[y], color=color, label=file, s=10)
+        if log:
+            ax.set_xscale("log")
+            ax.set_yscale("log")
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        ax.set_title(title)
+
+    plot_scatter(axs[0, 0], "v1", "v2", "v1", "v2", "v1 vs v2")
+    plot_scatter(
+        axs[0, 1],
+        "density",
+        "algebraic_connectivity",
+        "Density",
+        "Algebraic Connectivity",
+        "Density vs Algebraic Connectivity",
+        log=False,
+    )
+    plot_scatter(
+        axs[1, 0], "density", "energy", "Density", "Energy", "Density vs Energy", log=False
+    )
+    plot_scatter(
+        axs[1, 1],
+        "energy",
+        "algebraic_connectivity",
+        "Energy",
+        "Algebraic Connectivity",
+        "Energy vs Algebraic Connectivity",
+        log=False,
+    )
+
+    fig.tight_layout(rect=[0, 0, 1, 0.95])  # Leave space for the legend
+    return fig
+
+
+def matilda_perf(results: dict[str, pd.DataFrame], metadata: pd.DataFrame) -> plt.Figure:
+    """
+    The matilda instances on the instance space, coloured by the relative
+    difference of the times of the first two builds (matilda2.py).
+    """
+    (name_1, r1), (name_2, r2) = list(results.items())[:2]
+    results = {k: r[r["instance"].str.startswith("g")] for k, r in ((name_1, r1), (name_2, r2))}
+
+    # diff := (time_1 - time_2) / min(time_1, time_2)
+    # diff < 0: algorithm 1 is faster
+    # diff > 0: algorithm 2 is faster
+    # diff = -inf: algorithm 1 solved the instance and algorithm 2 did not
+    # diff = +inf: algorithm 2 solved the instance and algorithm 1 did not
+    df = compare(results, relative_difference).rename(columns={name_2: "diff"})
+    df = project(pd.merge(df, metadata, on="instance"))
+
+    # Those only one of them solved (+-inf) end up at the edges
+    finite = df["diff"][np.isfinite(df["diff"])]
+    range = max(abs(finite.quantile(0.05)), abs(finite.quantile(0.95)))
+    df["diff"] = df["diff"].clip(-range, range)
+    df = df[abs(df["diff"]) > 5]
+    print(df)
+
+    df = df.sample(frac=1, random_state=0).reset_index(drop=True)  # random
+
+    fig, axs = plt.subplots(2, 2)
+    pairs = [
+        (axs[0, 0], "v1", "v2", "v1", "v2"),
+        (axs[0, 1], "density", "energy", "Density", "Energy"),
+        (axs[1, 0], "energy", "algebraic_connectivity", "Energy", "Algebraic Connectivity"),
+        (axs[1, 1], "algebraic_connectivity", "density", "Algebraic Connectivity", "Density"),
+    ]
+    for ax, x, y, xlabel, ylabel in pairs:
+        scatter = ax.scatter(df[x], df[y], c=df["diff"], cmap="coolwarm", s=15)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+
+    # Place one colorbar on the bottom of the plot
+    mark = (range // 10) * 10
+    ticks = [-mark, -mark // 2, 0, mark // 2, mark]
+    labels = [f"{abs(t):.0f}" for t in ticks]
+    labels[0] += f"\n{name_1} is faster"
+    labels[-1] += f"\n{name_2} is faster"
+
+    cbar = fig.colorbar(scatter, ax=axs, orientation="horizontal", pad=0.08, fraction=0.05)
+    cbar.set_ticks(ticks=ticks, labels=labels)
+    return fig
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Performance profiles of several builds (pp.py, pp2.py).
+
+The results of every build are aligned on the instances once, as arrays of
+shape (instances, builds), and everything else is array operations on them:
+solved times, gaps, Dolan-Moré performance ratios and their ECDFs.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+
+class Aligned(NamedTuple):
+    instances: np.ndarray
+    builds: list[str]
+    lb: np.ndarray  # (instances, builds), NaN where a build has no result
+    ub: np.ndarray
+    time: np.ndarray
+
+    def solved(self) -> np.ndarray:
+        return (self.lb == self.ub) & (self.lb > 0)
+
+    def common(self) -> "Aligned":
+        """
+        Only the instances every build has a result for.
+        """
+        keep = ~np.isnan(self.ub).any(axis=1)
+        return Aligned(
+            self.instances[keep],
+            self.builds,
+            self.lb[keep],
+            self.ub[keep],
+            self.time[keep],
+        )
+
+
+def align(results: dict[str, pd.DataFrame], instances=None) -> Aligned:
+    """
+    Align the results of each build ({name: table}) on the instances, by
+    default all those in any of the tables. Duplicate instances keep their
+    first row.
+    """
+    builds = list(results)
+    df = pd.concat(
+        [r[["instance", "lb", "ub", "time"]].assign(build=b) for b, r in results.items()],
+        ignore_index=True,
+    )
+    df = df.drop_duplicates(["instance", "build"])
+    for c in ("lb", "ub", "time"):
+        df[c] = pd.to_numeric(df[c], errors="coerce")
+
+    wide = df.pivot(index="instance", columns="build")
+    if instances is not None:
+        wide = wide.reindex(sorted(instances))
+
+    def column(c):
+        return wide[c].reindex(columns=builds).to_numpy(dtype=float)
+
+    return Aligned(
+        wide.index.to_numpy(), builds, column("lb"), column("ub"), column("time")
+    )
+
+
+def solved_times(a: Aligned, tl: float = 3600, unsolved: float = 4000) -> np.ndarray:
+    """
+    The time of each solved run, capped at `tl`, and `unsolved` otherwise.
+    """
+    return np.where(a.solved(), np.minimum(a.time, tl), unsolved)
+
+
+def gaps(a: Aligned) -> np.ndarray:
+    """
+    The relative gap (ub - lb) / lb, or ub / 2 without a lower bound. NaN
+    where there is no upper bound.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(a.lb > 0, (a.ub - a.lb) / a.lb, a.ub / 2)
+
+
+def ratios(a: Aligned) -> np.ndarray:
+    """
+    Dolan-Moré performance ratios: the time of each build over the best time
+    on that instance, inf where the build did not solve it (or solved it
+    without a time). Instances nobody solved are inf for everyone.
+    """
+    t = np.where(a.solved() & ~np.isnan(a.time), a.time, np.inf)
+    best = t.min(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore"):
+        r = t / best
+    return np.where(np.isfinite(best), r, np.inf)
+
+
+def ecdf(values: np.ndarray, n: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The steps (x, y) of the ECDF of the finite values, as a fraction of `n`
+    (by default all values, so the non-finite ones are never reached).
+    """
+    n = n or len(values)
+    x = np.sort(values[np.isfinite(values)])
+    return x, np.arange(1, len(x) + 1) / n
+
+
+def profile(r: np.ndarray, taus: np.ndarray) -> np.ndarray:
+    """
+    rho[t, s], the fraction of instances on which build s is within a
+    factor taus[t] of the best one.
+    """
+    r = np.sort(r, axis=0)
+    rho = np.column_stack(
+        [np.searchsorted(r[:, s], taus, side="right") for s in range(r.shape[1])]
+    )
+    return rho / r.shape[0]
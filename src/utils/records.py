@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Parsing works with one plain dict per log, {column: value}. Those are only
+turned into a table once, at the end, by `to_frame`.
+
+pandas is only imported by `to_frame`, so the scripts start without it.
+"""
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Bounds and times may be missing, so they are floats with NaN. Counts use
+# pandas' nullable integer. Columns not listed here are inferred.
+DTYPES = {
+    "instance": "object",
+    "lb": "float64",
+    "ub": "float64",
+    "solved": "float64",
+    "time": "float64",
+    "root_time": "float64",
+    "root_lb": "Int64",
+    "root_ub": "Int64",
+    "components": "Int64",
+    "sets_root": "Int64",
+    "pricings_root": "Int64",
+    "errors": "Int64",
+    "warnings": "Int64",
+    "wall_time": "float64",
+    "user_time": "float64",
+    "sys_time": "float64",
+    "max_rss": "float64",
+    "exit_code": "Int64",
+    "exit_signal": "Int64",
+    "killed": "Int64",
+    "tl": "float64",
+    "resolved_tl": "float64",
+}
+
+
+def to_frame(records: list[dict], dtypes: dict = DTYPES) -> "pd.DataFrame":
+    """
+    Build a single table from the records, column by column.
+    Empty strings, used by the get_* functions for "no value", become NA.
+    """
+    import pandas as pd
+
+    columns = {}
+    for r in records:
+        for key in r:
+            columns.setdefault(key, None)
+
+    data = {}
+    for c in columns:
+        values = [r.get(c) for r in records]
+        values = [None if v == "" else v for v in values]
+        data[c] = pd.Series(values, dtype=dtypes.get(c))
+
+    return pd.DataFrame(data)
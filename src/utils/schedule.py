@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Longest-expected-first scheduling of the runs.
+
+Starting the long runs first avoids ending a sweep with a single long run
+and every other core idle. The expected runtime of an instance comes from
+previous results or, failing that, from the size of its file.
+
+The same estimates split an instance set into shards of about the same
+total runtime, one per machine (see `shard`).
+"""
+import hashlib
+import heapq
+import os
+import statistics
+
+
+def past_runtimes(history: list[str], tl: float) -> dict[str, float]:
+    """
+    Runtime of each instance in previous result CSVs, capped at the time
+    limit. Runs without a time (timeouts) count as the time limit. With
+    several files, keep the longest.
+    """
+    import pandas as pd
+
+    times = {}
+    for f in history:
+        if not os.path.exists(f):
+            continue
+        df = pd.read_csv(f)
+        t = df["time"]
+        if "wall_time" in df:
+            t = df["wall_time"].fillna(t)
+        t = t.fillna(tl).clip(upper=tl)
+        for i, v in zip(df["instance"], t):
+            times[i] = max(times.get(i, 0.0), float(v))
+    return times
+
+
+def expected_runtimes(instances, tl: float, inst_dir: str, history=()) -> dict:
+    """
+    Instances without history are estimated from their file size, scaled by
+    the median time per byte of those with history. Without any history the
+    scale is 1, so the estimates only order the instances by size.
+
+    The estimates are not capped at the time limit, which would make most
+    of them equal (and the order random). Only `makespan` caps them.
+    """
+    past = past_runtimes(history, tl)
+    size = {i: os.path.getsize(f"{inst_dir}/all/{i}") for i in instances}
+    ratios = [past[i] / size[i] for i in instances if i in past and size[i]]
+    scale = statistics.median(ratios) if ratios else 1.0
+
+    return {i: past[i] if i in past else scale * size[i] for i in instances}
+
+
+def longest_first(instances, expected: dict) -> list:
+    return sorted(instances, key=lambda i: expected[i], reverse=True)
+
+
+def makespan(durations, workers: int, tl: float | None = None) -> float:
+    """
+    Makespan of list scheduling: each run, in the given order, starts on the
+    first worker to become free, and lasts at most `tl`.
+    """
+    free = [0.0] * max(1, workers)
+    for d in durations:
+        heapq.heapreplace(free, free[0] + (min(d, tl) if tl else d))
+    return max(free)
+
+
+def stable_hash(name: str) -> int:
+    """
+    Hash of the name that is the same on every machine and run, unlike
+    Python's `hash`.
+    """
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "big")
+
+
+def parse_shard(s: str) -> tuple[int, int]:
+    """
+    Parse "i/k", the i-th of k shards, with 1 <= i <= k.
+    """
+    i, k = (int(x) for x in s.split("/"))
+    if not 1 <= i <= k:
+        raise ValueError(f"Shard {s} is not of the form i/k with 1 <= i <= k")
+    return i, k
+
+
+def shard(instances, i: int, k: int, expected: dict | None = None) -> list:
+    """
+    The instances of the i-th of k shards (1 <= i <= k). Every instance is
+    in exactly one shard, and any machine computes the same shards from
+    the same instances and `expected` runtimes.
+
+    Without expected runtimes, an instance goes to the shard of its hash.
+    With them, the instances are split greedily, longest first, each into
+    the shard with the least total so far, so the shards take about the
+    same time. Ties are broken by hash, never by the order given.
+    """
+    if expected is None:
+        return [x for x in instances if stable_hash(x) % k == i - 1]
+
+    order = sorted(instances, key=lambda x: (-expected[x], stable_hash(x), x))
+    load = [(0.0, j) for j in range(k)]
+    mine = []
+    for x in order:
+        total, j = heapq.heappop(load)
+        if j == i - 1:
+            mine.append(x)
+        heapq.heappush(load, (total + expected[x], j))
+    return mine
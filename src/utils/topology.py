@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+CPU topology from sysfs, to place each solver on its own physical core.
+
+Everything takes the sysfs cpu directory as `root`, so it can be pointed to
+a fake tree with the same layout:
+
+    root/online                                  "0-7"
+    root/cpuN/topology/thread_siblings_list      "0,4"
+    root/cpuN/nodeM                              (only its name is used)
+"""
+import functools
+import os
+import shutil
+
+SYSFS = "/sys/devices/system/cpu"
+
+
+def parse_list(s: str) -> list[int]:
+    """
+    Parse a sysfs cpu list such as "0-3,8,10-11".
+    """
+    cpus = []
+    for part in s.strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-")
+            cpus.extend(range(int(lo), int(hi) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def read(path: str) -> str:
+    with open(path) as fd:
+        return fd.read()
+
+
+def numa_node(root: str, cpu: int) -> int:
+    for name in os.listdir(f"{root}/cpu{cpu}"):
+        if name.startswith("node") and name[4:].isdigit():
+            return int(name[4:])
+    return 0
+
+
+def physical_cores(root: str = SYSFS) -> list[list[int]]:
+    """
+    The logical CPUs of each physical core, sorted by NUMA node and first
+    CPU. The first CPU of each core is its "main" thread. Returns an empty
+    list if the topology can not be read (e.g. on macOS).
+    """
+    try:
+        online = parse_list(read(f"{root}/online"))
+    except OSError:
+        return []
+
+    cores = {}
+    for cpu in online:
+        try:
+            siblings = parse_list(read(f"{root}/cpu{cpu}/topology/thread_siblings_list"))
+        except OSError:
+            siblings = [cpu]
+        siblings = tuple(sorted(c for c in siblings if c in online))
+        cores[siblings] = numa_node(root, cpu)
+
+    order = sorted(cores, key=lambda c: (cores[c], c[0]))
+    return [list(c) for c in order]
+
+
+def placement(workers: int, siblings: bool = False, root: str = SYSFS):
+    """
+    One set of CPUs per worker, each on a different physical core, or None
+    if there are not enough cores to give one to each worker.
+
+    Without `siblings`, each worker gets only the main thread of its core,
+    so the other hyperthreads stay idle.
+    """
+    cores = physical_cores(root)
+    if workers > len(cores):
+        return None
+    cores = cores[-workers:]  # leave the first cores, where the OS is, for last
+    return [set(c) if siblings else {c[0]} for c in cores]
+
+
+def siblings_of(cpus: set[int], root: str = SYSFS) -> set[int]:
+    """
+    Every logical CPU of the physical cores the given CPUs are on.
+    """
+    return set().union(cpus, *(c for c in physical_cores(root) if cpus & set(c)))
+
+
+@functools.cache
+def taskset() -> str | None:
+    return shutil.which("taskset")
+
+
+def pinned(cmd: list[str], cpus: set[int] | None) -> list[str]:
+    """
+    The command prefixed with `taskset -c <cpus>`, which pins itself before
+    it execs the command, so every thread the command starts inherits them.
+    Pinning it by pid after Popen would only reach its main thread, and a
+    preexec_fn is not safe in the threads the jobs are started from. The
+    command as is without CPUs or without taskset (e.g. on macOS).
+    """
+    if not cpus or taskset() is None:
+        return cmd
+    return [taskset(), "-c", ",".join(map(str, sorted(cpus))), *cmd]
+
+
+def pin(pid: int, cpus: set[int] | None):
+    """
+    Restrict the process to the given CPUs. A no-op without CPUs or where
+    affinity is not supported.
+    """
+    if not cpus or not hasattr(os, "sched_setaffinity"):
+        return
+    try:
+        os.sched_setaffinity(pid, cpus)
+    except ProcessLookupError:
+        pass  # already gone
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Bound trajectories: every (time, lb, ub) event of a run, not only the final
+bounds. After each event, lb and ub are the best bounds known so far (NaN if
+there is none yet).
+
+The trajectories of a build are stored in one compressed numpy file, in CSR
+form: the events of the i-th instance are `time[offsets[i]:offsets[i+1]]`
+(and the same for lb and ub).
+"""
+import re
+
+import numpy as np
+
+from utils.parse_functions import scan, ALL, LAST
+from utils.utils import get_all_files, pmap
+
+LB = "New lower bound: "
+UB = ("| .   .   Upper", "| .   Upper")
+ROOT = "Root "
+SOL = "Coloring: SOL"
+COMPONENTS = "{ solve_connected"
+
+TIMESTAMP = re.compile(r"^\(\s*([0-9.]+)s\)")
+
+
+def timestamp(line: str) -> float:
+    """
+    Seconds since the start, from loguru's preamble "(   1.234s)".
+    """
+    m = TIMESTAMP.match(line)
+    return float(m.group(1)) if m else np.nan
+
+
+def extract(log_file) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The trajectory of one of our logs as (time, lb, ub) arrays.
+    As in get_lb/get_ub, runs with more than one component have no
+    global bounds, so their trajectory is empty.
+    """
+    patterns = {p: ALL for p in (LB, *UB, ROOT, COMPONENTS)} | {SOL: LAST}
+    log = scan(log_file, patterns)
+    if len(log.grep(COMPONENTS)) != 1:
+        return empty()
+
+    events = []
+    lb, ub = np.nan, np.nan
+    for p, line in log.events(LB, *UB, ROOT, SOL):
+        if p == LB:
+            lb = np.fmax(lb, int(line.split()[-1]))
+        elif p == ROOT:
+            root_lb, root_ub = line.split("Root ")[1].split("|")
+            lb = np.fmax(lb, int(root_lb.split()[0]))
+            ub = np.fmin(ub, int(root_ub.split()[0]))
+        elif p == SOL:
+            lb = ub = float(line.split("SOL")[-1].split()[0])
+        else:
+            ub = np.fmin(ub, int(line.split()[-1]))
+        events.append((timestamp(line), lb, ub))
+
+    return as_arrays(events)
+
+
+def bounds_at(time: np.ndarray, lb: np.ndarray, ub: np.ndarray, t: float):
+    """
+    The best (lb, ub) known at time t, NaN if there was none yet.
+    """
+    before = np.flatnonzero(time <= t)
+    if len(before) == 0:
+        return np.nan, np.nan
+    return lb[before[-1]], ub[before[-1]]
+
+
+def as_arrays(events: list[tuple]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    if not events:
+        return empty()
+    time, lb, ub = np.array(events, dtype=np.float64).T
+    return time, lb, ub
+
+
+def empty() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    return tuple(np.empty(0, dtype=np.float64) for _ in range(3))
+
+
+class Trajectories:
+    """
+    The trajectories of every instance of a build.
+    """
+
+    def __init__(self, instance, offsets, time, lb, ub):
+        self.instance = np.asarray(instance)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.time = np.asarray(time, dtype=np.float64)
+        self.lb = np.asarray(lb, dtype=np.float64)
+        self.ub = np.asarray(ub, dtype=np.float64)
+        self.index = {name: i for i, name in enumerate(self.instance)}
+
+    @classmethod
+    def from_dict(cls, trajectories: dict):
+        """
+        From {instance: (time, lb, ub)}.
+        """
+        names = sorted(trajectories)
+        sizes = [len(trajectories[n][0]) for n in names]
+        offsets = np.concatenate([[0], np.cumsum(sizes, dtype=np.int64)])
+        cols = [
+            np.concatenate([trajectories[n][k] for n in names] or [np.empty(0)])
+            for k in range(3)
+        ]
+        return cls(names, offsets, *cols)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as f:
+            return cls(f["instance"], f["offsets"], f["time"], f["lb"], f["ub"])
+
+    def save(self, path: str):
+        np.savez_compressed(
+            path,
+            instance=self.instance.astype(str),
+            offsets=self.offsets,
+            time=self.time,
+            lb=self.lb,
+            ub=self.ub,
+        )
+
+    def __len__(self):
+        return len(self.instance)
+
+    def __getitem__(self, instance: str):
+        i = self.index[instance]
+        s = slice(self.offsets[i], self.offsets[i + 1])
+        return self.time[s], self.lb[s], self.ub[s]
+
+
+def collect(directory, output: str = "", extract=extract) -> Trajectories:
+    """
+    Extract the trajectories of every log in the directory.
+    """
+    all_files = get_all_files(directory)
+    names = [f.split("/")[-1].replace(".log", "") for f in all_files]
+    traj = Trajectories.from_dict(dict(zip(names, pmap(extract, all_files))))
+    if output:
+        traj.save(output)
+    return traj
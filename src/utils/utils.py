@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 import os
-from random import shuffle
+import random
+
+from utils.catalog import get_catalog
+from utils.topology import physical_cores
 
 
 def get_all_files(directory):
@@ -26,31 +29,36 @@ def get_all_files(directory):
     return all_files
 
 
-def get_instances_from_set(inst_dir: str, sets: str) -> list[str]:
+def get_instances_from_set(
+    inst_dir: str, sets: str, seed=None, conditions: str = ""
+) -> list[str]:
     """
     Given a set ("easy") or a combination of sets ("easy+hard"),
-    return a list of names of all instances in the set(s).
-    """
-    all = []
-    for inst_set in sets.split("+"):
-        inst = get_all_files(f"{inst_dir}/{inst_set}")
-        inst = [i.split("/")[-1] for i in inst]
-        all.extend(inst)
-    all = list(set(all))
-    shuffle(all)
+    return a list of names of all instances in the set(s), optionally only
+    those satisfying the conditions ("n > 500"), see utils.catalog.
+
+    The list is shuffled, in the same order on any machine for the same
+    `seed`. Without a seed, the order is different each time.
+    """
+    all = get_catalog(inst_dir).query(sets, conditions)
+    random.Random(seed).shuffle(all)
     return all
 
 
 def get_n_jobs():
     """
     Get the number of jobs to run in parallel. This is the number of physical
-    cores on the machine.
-
-    If the machine is a x86, os.cpu_count() will return the number of logical
-    cores, which is not what we want.
+    cores on the machine, minus one for the OS.
 
-    If the machine is a arm64, os.cpu_count() will return the number of physical.
+    Where the topology can not be read from sysfs, we guess: if the machine
+    is a x86, os.cpu_count() will return the number of logical cores, which
+    is not what we want. If the machine is a arm64, os.cpu_count() will
+    return the number of physical.
     """
+    physical = len(physical_cores())
+    if physical:
+        return max(1, physical - 1)
+
     cores = os.cpu_count()
     if cores is None:
         return
@@ -60,3 +68,24 @@ def get_n_jobs():
         return cores
 
     return cores // 2
+
+
+def pmap(func, items: list, workers=None, processes=True):
+    """
+    Map `func` over `items` in a pool, yielding the results in order.
+
+    With processes, the items are sent in chunks (a few per worker) so that
+    thousands of small tasks do not pay one round trip each. `func` and its
+    results must be picklable, so prefer returning plain dicts.
+    """
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    if not processes:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            yield from ex.map(func, items)
+        return
+
+    chunksize = max(1, len(items) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        yield from ex.map(func, items, chunksize=chunksize)